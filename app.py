@@ -1,4 +1,7 @@
+import html
+import io
 import os
+import re
 
 # Load environment variables from .env file
 try:
@@ -13,9 +16,11 @@ os.environ.setdefault("OPENCV_IO_ENABLE_OPENEXR", "0")
 os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 os.environ.setdefault("OPENCV_VIDEOIO_PRIORITY_MSMF", "0")
 
+from collections import Counter
 from datetime import date
-from typing import Optional, Dict, Any, List, Tuple
-from queue import Queue, Empty, Full
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Tuple
+from queue import Queue, Empty
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -24,10 +29,12 @@ from PIL import Image
 import streamlit as st
 
 import database
+from frame_analyzer import FrameAnalyzer
 from music_engine import MusicEngine
 from recommendation_logic import generate_playlist
 
-# Optional imports for webcam mode
+# Optional imports for webcam mode, bound by load_webcam_stack() the first time
+# webcam mode is opened so the login page doesn't pay for OpenCV/PyAV imports
 webrtc_streamer = None
 av = None
 cv2 = None
@@ -35,59 +42,389 @@ analyze_frame = None
 
 _dependency_errors: List[Tuple[str, str]] = []
 
-try:
-    from streamlit_webrtc import webrtc_streamer as _webrtc_streamer
 
-    webrtc_streamer = _webrtc_streamer
-except ImportError as exc:
-    _dependency_errors.append(("streamlit-webrtc", str(exc)))
+@st.cache_resource(show_spinner=False)
+def _import_webcam_stack() -> Dict[str, Any]:
+    """Import the realtime webcam dependencies once per process, recording failures."""
+    stack: Dict[str, Any] = {
+        "webrtc_streamer": None,
+        "av": None,
+        "cv2": None,
+        "analyze_frame": None,
+        "errors": [],
+    }
 
-try:
-    import av as _av  # type: ignore[assignment]
+    try:
+        from streamlit_webrtc import webrtc_streamer as _webrtc_streamer
 
-    av = _av
-except ImportError as exc:
-    _dependency_errors.append(("av", str(exc)))
+        stack["webrtc_streamer"] = _webrtc_streamer
+    except ImportError as exc:
+        stack["errors"].append(("streamlit-webrtc", str(exc)))
 
-try:
-    import cv2 as _cv2  # type: ignore[assignment]
+    try:
+        import av as _av  # type: ignore[assignment]
 
-    cv2 = _cv2
-except (ImportError, OSError) as exc:
-    # OSError catches libGL.so.1 and other system library errors
-    _dependency_errors.append(("opencv-python-headless", str(exc)))
-    cv2 = None
+        stack["av"] = _av
+    except ImportError as exc:
+        stack["errors"].append(("av", str(exc)))
 
-try:
-    from emotion_detector import analyze_frame as _analyze_frame
+    try:
+        import cv2 as _cv2  # type: ignore[assignment]
+
+        stack["cv2"] = _cv2
+    except (ImportError, OSError) as exc:
+        # OSError catches libGL.so.1 and other system library errors
+        stack["errors"].append(("opencv-python-headless", str(exc)))
+
+    try:
+        from emotion_detector import analyze_frame as _analyze_frame
+
+        stack["analyze_frame"] = _analyze_frame
+    except (ImportError, OSError, Exception) as exc:  # noqa: BLE001 - expose exact failure to the UI
+        # OSError catches libGL.so.1 and other system library errors
+        # This is common on Streamlit Cloud where system libraries are limited
+        stack["errors"].append(("emotion_detector", str(exc)))
+
+    return stack
 
-    analyze_frame = _analyze_frame
-except (ImportError, OSError, Exception) as exc:  # noqa: BLE001 - expose exact failure to the UI
-    # OSError catches libGL.so.1 and other system library errors
-    # This is common on Streamlit Cloud where system libraries are limited
-    _dependency_errors.append(("emotion_detector", str(exc)))
-    analyze_frame = None
+
+def load_webcam_stack() -> None:
+    """Bind the cached webcam dependencies to this module's globals."""
+    global webrtc_streamer, av, cv2, analyze_frame, _dependency_errors
+    stack = _import_webcam_stack()
+    webrtc_streamer = stack["webrtc_streamer"]
+    av = stack["av"]
+    cv2 = stack["cv2"]
+    analyze_frame = stack["analyze_frame"]
+    _dependency_errors = stack["errors"]
 
 
 st.set_page_config(page_title="Music Therapy Recommender", layout="wide")
 
-database.init_db()
+
+# Run schema setup/migrations once per process instead of on every rerun
+@st.cache_resource
+def _init_database() -> bool:
+    """Initialize the SQLite schema once per server process."""
+    database.init_db()
+    return True
+
+_init_database()
 
 # Cache the MusicEngine to prevent re-initialization on every rerun
 @st.cache_resource
-def get_music_engine():
+def get_music_engine() -> MusicEngine:
     """Initialize and cache the MusicEngine singleton."""
     return MusicEngine()
 
-engine = get_music_engine()
 
-TARGET_MOODS: List[str] = getattr(
-    database,
-    "TARGET_MOODS",
-    ["calm", "happy", "focused", "energized", "relaxed"],
+# Cache database reads so widget-triggered reruns don't hit SQLite every time.
+# Writes call the matching .clear() so the next rerun sees fresh rows.
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_profiles_therapist(therapist_id: int) -> List[Dict[str, Any]]:
+    return database.get_profiles_for_therapist(therapist_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_profiles_parent(parent_id: int) -> List[Dict[str, Any]]:
+    return database.get_profiles_for_parent(parent_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_parents(profile_ids: Tuple[int, ...]) -> Dict[int, List[Dict[str, Any]]]:
+    return database.get_parents_for_profiles(profile_ids)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_invites(profile_ids: Tuple[int, ...]) -> Dict[int, List[Dict[str, Any]]]:
+    return database.list_invites_for_profiles(profile_ids)
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _cached_profile(profile_id: int) -> Optional[Dict[str, Any]]:
+    return database.get_profile(profile_id)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_history(profile_id: int) -> pd.DataFrame:
+    """
+    Session history prepared for the dashboard: IST timestamps, sorted, with
+    the derived feedback and journey columns already added.
+    """
+    history_df = database.get_history(profile_id)
+    if history_df.empty:
+        return history_df
+
+    # Convert to IST (Indian Standard Time - UTC+5:30)
+    try:
+        # Try to localize to UTC and convert to Asia/Kolkata
+        if history_df["timestamp"].dt.tz is None:
+            history_df["timestamp"] = history_df["timestamp"].dt.tz_localize('UTC').dt.tz_convert('Asia/Kolkata')
+        else:
+            history_df["timestamp"] = history_df["timestamp"].dt.tz_convert('Asia/Kolkata')
+    except Exception:
+        # Fallback: manually add 5:30 hours if timezone conversion fails
+        history_df["timestamp"] = history_df["timestamp"] + pd.Timedelta(hours=5, minutes=30)
+    history_df.sort_values("timestamp", inplace=True)
+
+    # Encode feedback as categorical codes once; later checks are integer compares
+    feedback_codes = pd.Categorical(
+        history_df["feedback_emoji"], categories=FEEDBACK_ORDER
+    ).codes
+    history_df["is_positive"] = (feedback_codes == FEEDBACK_ORDER.index("happy")).astype(int)
+    # Rolling success rate (positive feedback over last 5 sessions)
+    history_df["rolling_success"] = history_df["is_positive"].rolling(window=min(5, len(history_df)), min_periods=1).mean() * 100
+    history_df["journey"] = history_df["start_mood"].str.title() + " → " + history_df["target_mood"].str.title()
+    return history_df
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_history_summary(profile_id: int) -> Dict[str, Any]:
+    """
+    Dashboard headline numbers and chart inputs, aggregated once per profile
+    so reruns only redraw. Only called for a non-empty history.
+    """
+    history_df = _cached_history(profile_id)
+    # value_counts is one hash aggregate (NaN dropped); sorting the few distinct
+    # targets keeps mode()'s tie rule of picking the alphabetically first
+    target_counts = history_df["target_mood"].value_counts().sort_index()
+    return {
+        "total_sessions": len(history_df),
+        "last_session": history_df["timestamp"].max(),
+        "positive_pct": int(round(history_df["is_positive"].mean() * 100)),
+        "top_target": target_counts.idxmax().title() if not target_counts.empty else "Calm",
+        # At most three feedback values, so a Counter beats a pandas groupby
+        "feedback_counts": Counter(history_df["feedback_emoji"].dropna().tolist()).most_common(),
+        "journey_counts": history_df["journey"].value_counts().head(6),
+    }
+
+
+def _chart_colors(is_light_theme: bool) -> Tuple[str, str, str, str]:
+    """Text, grid, spine and empty-state colours for the dashboard charts."""
+    if is_light_theme:
+        return "#0f172a", "#cbd5e1", "#94a3b8", "#64748b"
+    return "white", "white", "white", "white"
+
+
+def _figure_png(fig) -> bytes:
+    """Serialize a finished figure the way st.pyplot would, then free it."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight", facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return buf.getvalue()
+
+
+# Dashboard charts are rendered to PNG once per (profile, theme) and reused
+# across reruns; invalidate_history_cache() drops them with the history.
+@st.cache_data(ttl=30, show_spinner=False)
+def _success_trend_png(profile_id: int, is_light_theme: bool) -> bytes:
+    history_df = _cached_history(profile_id)
+    text_color, grid_color, spine_color, _ = _chart_colors(is_light_theme)
+    # Use solid background instead of RGBA tuple for better compatibility
+    fig_bg = 'white' if is_light_theme else '#0e1117'
+    ax_bg = 'white' if is_light_theme else '#0e1117'
+    
+    fig, ax = plt.subplots(figsize=(6, 3.2), facecolor=fig_bg)
+    ax.set_facecolor(ax_bg)
+    
+    # Plot line with gradient effect
+    ax.plot(history_df["timestamp"], history_df['rolling_success'], 
+            color="#10b981", linewidth=3, marker="o", markersize=6, 
+            markerfacecolor="#10b981", markeredgecolor="white", markeredgewidth=2,
+            label="Success Rate", zorder=3)
+    ax.fill_between(history_df["timestamp"], history_df['rolling_success'], 
+                    color="#10b981", alpha=0.15, zorder=2)
+    
+    # Target line
+    ax.axhline(y=70, color='#f59e0b', linestyle='--', linewidth=2, 
+               alpha=0.7, label='Target: 70%', zorder=1)
+    
+    ax.set_ylabel("Success Rate (%)", color=text_color, fontsize=11, fontweight=600)
+    ax.set_ylim(0, 105)
+    ax.grid(axis="y", linestyle="--", alpha=0.15, color=grid_color, linewidth=1)
+    ax.tick_params(axis="x", rotation=25, labelsize=9, colors=text_color)
+    ax.tick_params(axis="y", labelsize=10, colors=text_color)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["bottom"].set_color(spine_color)
+    ax.spines["bottom"].set_linewidth(1.5)
+    ax.spines["left"].set_color(spine_color)
+    ax.spines["left"].set_linewidth(1.5)
+    
+    legend = ax.legend(loc='upper left', fontsize=9, framealpha=0.9)
+    if is_light_theme:
+        legend.get_frame().set_facecolor('white')
+    else:
+        legend.get_frame().set_facecolor('#262730')
+    legend.get_frame().set_edgecolor(spine_color)
+    
+    fig.tight_layout()
+    return _figure_png(fig)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _feedback_mix_png(profile_id: int, is_light_theme: bool) -> bytes:
+    feedback_counts = _cached_history_summary(profile_id)["feedback_counts"]
+    text_color, _, _, empty_text_color = _chart_colors(is_light_theme)
+    # Use solid background
+    fig_bg = 'white' if is_light_theme else '#0e1117'
+    ax_bg = 'white' if is_light_theme else '#0e1117'
+    
+    fig, ax = plt.subplots(figsize=(4.5, 3.4), facecolor=fig_bg)
+    ax.set_facecolor(ax_bg)
+    
+    if not feedback_counts:
+        ax.axis("off")
+        ax.text(0.5, 0.5, "No feedback yet", ha="center", va="center", 
+               fontsize=11, color=empty_text_color, fontweight=500)
+    else:
+        # Modern color palette
+        colors = ["#10b981", "#f59e0b", "#ef4444"]  # Emerald, Amber, Red
+        
+        wedges, texts, autotexts = ax.pie(
+            [count for _, count in feedback_counts],
+            labels=[label.title() for label, _ in feedback_counts],
+            autopct="%1.0f%%",
+            startangle=90,
+            colors=colors[: len(feedback_counts)],
+            wedgeprops={"linewidth": 2, "edgecolor": "white"},
+            textprops={"fontsize": 10, "color": text_color, "fontweight": 600},
+            pctdistance=0.75
+        )
+        
+        # Donut hole with solid colors
+        if is_light_theme:
+            centre_circle = plt.Circle((0, 0), 0.65, fc="white", ec="#e2e8f0", linewidth=2)
+            percentage_color = "#0f172a"  # Dark text for light theme
+        else:
+            centre_circle = plt.Circle((0, 0), 0.65, fc="#1e293b", ec="#334155", linewidth=2)
+            percentage_color = "white"  # White text for dark theme
+        ax.add_artist(centre_circle)
+        
+        # Style percentage text - theme adaptive
+        for autotext in autotexts:
+            autotext.set_color(percentage_color)
+            autotext.set_fontweight(700)
+            autotext.set_fontsize(10)
+        
+        # Style labels
+        for text in texts:
+            text.set_color(text_color)
+            text.set_fontweight(600)
+    
+    ax.axis("equal")
+    fig.tight_layout()
+    return _figure_png(fig)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _journeys_png(profile_id: int, is_light_theme: bool) -> Optional[bytes]:
+    """Horizontal bar chart of the top journeys, or None when there are none."""
+    journey_counts = _cached_history_summary(profile_id)["journey_counts"]
+    if journey_counts.empty:
+        return None
+    text_color, grid_color, spine_color, _ = _chart_colors(is_light_theme)
+    # Use solid background
+    fig_bg = 'white' if is_light_theme else '#0e1117'
+    ax_bg = 'white' if is_light_theme else '#0e1117'
+    
+    fig, ax = plt.subplots(figsize=(10, 4), facecolor=fig_bg)
+    ax.set_facecolor(ax_bg)
+    
+    # Gradient colors for bars
+    colors_gradient = plt.cm.viridis(np.linspace(0.3, 0.9, len(journey_counts)))
+    if is_light_theme:
+        colors_gradient = ["#6366f1", "#8b5cf6", "#a855f7", "#c026d3", "#d946ef", "#e879f9"][:len(journey_counts)]
+    
+    bars = ax.barh(journey_counts.index, journey_counts.values, 
+                  color=colors_gradient, alpha=0.9, height=0.7)
+    
+    # Add gradient effect to bars
+    for bar in bars:
+        bar.set_edgecolor("white" if is_light_theme else "#1e293b")
+        bar.set_linewidth(1.5)
+    
+    # Add count labels on bars with better styling
+    for i, (bar, count) in enumerate(zip(bars, journey_counts.values)):
+        ax.text(count + 0.15, i, f'{int(count)}x', 
+               va='center', color=text_color, fontsize=10, fontweight='bold')
+    
+    ax.set_xlabel("Number of Sessions", color=text_color, fontsize=11, fontweight=600)
+    ax.tick_params(axis="y", labelsize=10, colors=text_color)
+    ax.tick_params(axis="x", labelsize=10, colors=text_color)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["bottom"].set_color(spine_color)
+    ax.spines["bottom"].set_linewidth(1.5)
+    ax.spines["left"].set_color(spine_color)
+    ax.spines["left"].set_linewidth(1.5)
+    ax.grid(axis="x", linestyle="--", alpha=0.15, color=grid_color, linewidth=1)
+    
+    fig.tight_layout()
+    return _figure_png(fig)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_history_table(profile_id: int) -> pd.DataFrame:
+    """Session log with timestamps preformatted for display."""
+    history_df = _cached_history(profile_id)
+    return history_df.assign(timestamp=history_df["timestamp"].dt.strftime("%Y-%m-%d %H:%M IST"))
+
+
+def invalidate_history_cache() -> None:
+    """Drop cached session history and its aggregates after a write."""
+    _cached_history.clear()
+    _cached_history_summary.clear()
+    _cached_history_table.clear()
+    _success_trend_png.clear()
+    _feedback_mix_png.clear()
+    _journeys_png.clear()
+
+
+def invalidate_profile_cache() -> None:
+    """Drop cached profile, parent and invite lookups after a write."""
+    _cached_profiles_therapist.clear()
+    _cached_profiles_parent.clear()
+    _cached_parents.clear()
+    _cached_invites.clear()
+    _cached_profile.clear()
+
+
+# Immutable so widgets receive the same option objects on every rerun
+TARGET_MOODS: Tuple[str, ...] = tuple(
+    getattr(
+        database,
+        "TARGET_MOODS",
+        ["calm", "happy", "focused", "energized", "relaxed"],
+    )
+)
+TARGET_MOOD_INDEX: Dict[str, int] = {mood: i for i, mood in enumerate(TARGET_MOODS)}
+
+MOOD_OPTIONS: Tuple[str, ...] = ("happy", "sad", "angry", "fearful", "surprised", "loving", "energized", "anxious", "calm", "focused")
+
+# Feedback values written by the session feedback buttons, in display order
+FEEDBACK_ORDER = ("sad", "neutral", "happy")
+
+SPOTIFY_EMBED_TEMPLATE = (
+    '<iframe src="https://open.spotify.com/embed/track/{}" width="100%" height="80" '
+    'frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
 )
 
-MOOD_OPTIONS = ["happy", "sad", "angry", "fearful", "surprised", "loving", "energized", "anxious", "calm", "focused"]
+
+# Divider plus profile card for render_child_selection. {dob} shares a line
+# with the meta text so an empty value can't leave a blank line that ends
+# the HTML block early.
+PROFILE_CARD_TEMPLATE = """
+---
+
+<div class="profile-shell">
+    <div class="badge">🎯 Default Target · {target}</div>
+    <h3>{name}</h3>
+    <p class="meta">
+        {dob}Managed by therapist workspace
+    </p>
+</div>
+"""
 
 
 def normalize_emotion(value: Optional[str]) -> Optional[str]:
@@ -98,7 +435,34 @@ def normalize_emotion(value: Optional[str]) -> Optional[str]:
         return "neutral"
     return normalized
 
-THEMES: Dict[str, Dict[str, str]] = {
+
+# Face/emotion detection doesn't need full webcam resolution
+ANALYSIS_MAX_WIDTH = 320
+
+
+def downscale_for_analysis(frame_bgr: np.ndarray) -> np.ndarray:
+    """Return a copy of the frame no wider than ANALYSIS_MAX_WIDTH, keeping aspect ratio."""
+    height, width = frame_bgr.shape[:2]
+    if cv2 is None or width <= ANALYSIS_MAX_WIDTH:
+        return frame_bgr.copy()
+    scale = ANALYSIS_MAX_WIDTH / width
+    return cv2.resize(
+        frame_bgr,
+        (ANALYSIS_MAX_WIDTH, max(1, int(round(height * scale)))),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def decode_for_analysis(frame: "av.VideoFrame") -> np.ndarray:  # type: ignore[name-defined]
+    """Convert a VideoFrame to BGR at analysis width; swscale resizes during the colour conversion."""
+    if frame.width <= ANALYSIS_MAX_WIDTH:
+        return frame.to_ndarray(format="bgr24")
+    height = max(1, int(round(frame.height * ANALYSIS_MAX_WIDTH / frame.width)))
+    return frame.to_ndarray(format="bgr24", width=ANALYSIS_MAX_WIDTH, height=height)
+
+
+# Read-only: _build_theme_css caches per theme key and relies on this never changing
+THEMES: Mapping[str, Dict[str, str]] = MappingProxyType({
     "light": {
         "label": "Light",
         "primary": "#6366f1",  # Modern indigo - more sophisticated than pure blue
@@ -133,7 +497,12 @@ THEMES: Dict[str, Dict[str, str]] = {
         "input_border": "rgba(127, 219, 218, 0.2)",
         "input_text": "#E5ECFF",
     },
-}
+})
+
+# Selectbox options and lookups for render_theme_controls, built once
+THEME_LABELS: Tuple[str, ...] = tuple(theme["label"] for theme in THEMES.values())
+THEME_KEY_BY_LABEL: Dict[str, str] = {theme["label"]: key for key, theme in THEMES.items()}
+THEME_INDEX: Dict[str, int] = {key: i for i, key in enumerate(THEMES)}
 
 
 def _text_color_css(theme_key: str) -> str:
@@ -212,7 +581,6 @@ def _text_color_css(theme_key: str) -> str:
     .stTextInput label p, 
     .stSelectbox label p, 
     .stCheckbox label p, 
-    .stTabs button p,
     .stMarkdown p,
     .stMarkdown li,
     h1, h2, h3, h4, h5, h6 {{
@@ -222,9 +590,10 @@ def _text_color_css(theme_key: str) -> str:
     {button_css}
     """
 
-def apply_theme(theme_key: str) -> None:
+@st.cache_data(show_spinner=False)
+def _build_theme_css(theme_key: str) -> str:
+    """Theme stylesheet; THEMES never changes, so there is one entry per theme."""
     theme = THEMES.get(theme_key, THEMES["dark"])
-    st.session_state["theme"] = theme_key
     text_css = _text_color_css(theme_key)
 
     css = f"""
@@ -471,25 +840,13 @@ def apply_theme(theme_key: str) -> None:
         color: var(--app-input-text);
     }}
     
-    /* Text Input Styling */
+    /* Text Input Styling (colours, borders and spacing come from the
+       !important input rules at the end of this sheet) */
     .stTextInput input {{
-        background: var(--app-input-bg);
-        border-radius: 10px;
-        border: 2px solid var(--app-input-border);
-        color: var(--app-input-text);
         transition: all 0.2s ease;
-        box-shadow: 0 2px 8px rgba(15, 23, 42, 0.05);
-        padding: 0.65rem 1rem;
-    }}
-    
-    .stTextInput input:hover {{
-        border-color: var(--app-primary);
-        box-shadow: 0 4px 12px rgba(99, 102, 241, 0.15);
     }}
     
     .stTextInput input:focus {{
-        border-color: var(--app-primary);
-        box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.1);
         outline: none;
     }}
     
@@ -525,29 +882,36 @@ def apply_theme(theme_key: str) -> None:
     }}
     </style>
     """
-    st.markdown(css, unsafe_allow_html=True)
+    return css
+
+
+def apply_theme(theme_key: str) -> None:
+    st.markdown(_build_theme_css(theme_key), unsafe_allow_html=True)
+
+
+def _on_theme_change() -> None:
+    # Runs before the script, so main() applies the new theme in the same rerun
+    st.session_state["theme"] = THEME_KEY_BY_LABEL[st.session_state["theme_selectbox"]]
 
 
 def render_theme_controls(container: "st.delta_generator.DeltaGenerator") -> None:  # type: ignore[name-defined]
-    option_labels = {theme["label"]: key for key, theme in THEMES.items()}
     current_key = st.session_state.get("theme", "dark")
-    current_label = next(label for label, key in option_labels.items() if key == current_key)
-    selected_label = container.selectbox(
+    container.selectbox(
         "Interface Theme",
-        options=list(option_labels.keys()),
-        index=list(option_labels.keys()).index(current_label),
+        options=THEME_LABELS,
+        index=THEME_INDEX.get(current_key, THEME_INDEX["dark"]),
         key="theme_selectbox",
+        on_change=_on_theme_change,
     )
-    selected_key = option_labels[selected_label]
-    if selected_key != current_key:
-        st.session_state["theme"] = selected_key
-        trigger_rerun()
+
+
+# Resolved once: st.rerun on current Streamlit, experimental_rerun on older releases
+_RERUN_FN = getattr(st, "rerun", None) or getattr(st, "experimental_rerun", None)
 
 
 def trigger_rerun() -> None:
-    rerun_fn = getattr(st, "rerun", None) or getattr(st, "experimental_rerun", None)
-    if rerun_fn:
-        rerun_fn()  # type: ignore[operator]
+    if _RERUN_FN:
+        _RERUN_FN()  # type: ignore[operator]
     else:
         st.session_state["_needs_rerun_toggle"] = not st.session_state.get("_needs_rerun_toggle", False)
 
@@ -568,37 +932,45 @@ def ensure_session_defaults() -> None:
         st.session_state["_emotion_queue"] = Queue(maxsize=8)
 
 
+def stop_frame_analyzer() -> None:
+    """Stop and drop this session's realtime detection worker, if any."""
+    analyzer = st.session_state.pop("_frame_analyzer", None)
+    if isinstance(analyzer, FrameAnalyzer):
+        analyzer.close()
+
+
 def logout() -> None:
+    stop_frame_analyzer()
     for key in [
         "user_id",
         "user_role",
         "user_display_name",
         "selected_profile_id",
-        "selected_profile_name",
-        "selected_profile_target",
         "mode",
         "detected_mood",
         "last_detected_emotion",
         "current_playlist",
+        "current_playlist_json",
     ]:
         st.session_state.pop(key, None)
 
 
+# Stricter email regex: local@domain.extension
+# local part: alphanumeric, dots, hyphens, underscores (no @ allowed)
+# domain: alphanumeric and hyphens (no @ allowed)
+# TLD: 2+ letters
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$')
+
+
 def validate_email(email: str) -> tuple[bool, str]:
     """
     Validate email format.
     Returns (is_valid, error_message).
     """
-    import re
     email = email.strip()
     if not email:
         return False, "Email is required."
-    # Stricter email regex: local@domain.extension
-    # local part: alphanumeric, dots, hyphens, underscores (no @ allowed)
-    # domain: alphanumeric and hyphens (no @ allowed)
-    # TLD: 2+ letters
-    pattern = r'^[a-zA-Z0-9._%-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$'
-    if not re.match(pattern, email):
+    if not EMAIL_PATTERN.match(email):
         return False, "Email format is invalid. Use example@domain.com."
     # Additional check: only one @ symbol allowed
     if email.count('@') != 1:
@@ -639,22 +1011,41 @@ def require_authentication() -> bool:
 
 
 def set_active_profile(profile: Dict[str, Any]) -> None:
+    stop_frame_analyzer()
     st.session_state["selected_profile_id"] = profile["id"]
-    st.session_state["selected_profile_name"] = profile["child_name"]
-    st.session_state["selected_profile_target"] = (
-        profile.get("default_target_mood") or "calm"
-    )
     st.session_state["mode"] = None
     st.session_state["detected_mood"] = None
     st.session_state["last_detected_emotion"] = None
     # Clear journey tracking for fresh start
     st.session_state.pop("emotion_path", None)
     st.session_state.pop("current_playlist", None)
+    st.session_state.pop("current_playlist_json", None)
     st.session_state.pop("current_from", None)
     st.session_state.pop("current_to", None)
     st.session_state["current_transition_step"] = 0
 
 
+# Valence/arousal can be looked up again in MuSe by spotify_id, so only
+# the identifying columns are written to session_history
+PLAYLIST_PERSIST_COLUMNS = ("track", "artist", "spotify_id")
+
+
+def serialize_playlist(playlist_df: pd.DataFrame) -> str:
+    columns = [c for c in PLAYLIST_PERSIST_COLUMNS if c in playlist_df.columns]
+    # Row records without index keys are the most compact text form; the
+    # column stays TEXT so the dashboard's session log can still show it
+    return playlist_df[columns].to_json(orient="records")
+
+
+def store_playlist(playlist_df: pd.DataFrame) -> None:
+    """Keep the playlist and its serialized form together so feedback saves don't re-encode it."""
+    st.session_state["current_playlist"] = playlist_df
+    st.session_state["current_playlist_json"] = serialize_playlist(playlist_df)
+
+
+AUTH_VIEWS: Tuple[str, ...] = ("Log In", "Therapist Sign Up", "Parent Invitation")
+
+
 def render_login_signup() -> None:
     with st.sidebar:
         st.markdown("### Personalize")
@@ -685,9 +1076,17 @@ def render_login_signup() -> None:
             "**📈 Longitudinal Insight**  \nVisual dashboards surface mood trends and session outcomes."
         )
 
-    tabs = st.tabs(["Log In", "Therapist Sign Up", "Parent Invitation"])
+    # A radio instead of st.tabs: tabs build every panel's form on each rerun,
+    # while this only builds the one being viewed
+    auth_view = st.radio(
+        "View",
+        AUTH_VIEWS,
+        horizontal=True,
+        key="auth_view",
+        label_visibility="collapsed",
+    )
 
-    with tabs[0]:
+    if auth_view == "Log In":
         with st.form("login_form"):
             role_label = st.radio("I am a", ["Therapist", "Parent"], horizontal=True)
             email = st.text_input("Email")
@@ -720,7 +1119,7 @@ def render_login_signup() -> None:
                         else:
                             st.error("Invalid credentials. Please try again.")
 
-    with tabs[1]:
+    elif auth_view == "Therapist Sign Up":
         with st.form("therapist_signup_form"):
             st.subheader("Create a Therapist Account")
             name = st.text_input("Full Name")
@@ -762,7 +1161,7 @@ def render_login_signup() -> None:
                             except ValueError as exc:
                                 st.error(str(exc))
 
-    with tabs[2]:
+    else:
         st.subheader("Complete Your Parent Invitation")
         st.caption(
             "Use the invitation code you received via email from your therapist to create your account."
@@ -787,6 +1186,7 @@ def render_login_signup() -> None:
                     else:
                         try:
                             parent = database.complete_parent_invite(token.strip(), name, password)
+                            invalidate_profile_cache()
                             st.session_state["user_id"] = parent["id"]
                             st.session_state["user_role"] = "parent"
                             st.session_state["user_display_name"] = parent["name"]
@@ -803,7 +1203,7 @@ def render_child_selection() -> None:
 
     if role == "therapist":
         st.caption("Create a child profile, then share the invite code with parents to collaborate.")
-        profiles = database.get_profiles_for_therapist(user_id)
+        profiles = _cached_profiles_therapist(user_id)
         with st.expander("Add New Child Profile", expanded=not profiles):
             with st.form("new_profile_form"):
                 child_name = st.text_input("Child Name or Initials")
@@ -880,10 +1280,11 @@ def render_child_selection() -> None:
                                     )
                             else:
                                 st.success(success_msg)
+                            invalidate_profile_cache()
                             trigger_rerun()
     else:
         st.caption("Select one of your linked children to view their therapy tools.")
-        profiles = database.get_profiles_for_parent(user_id)
+        profiles = _cached_profiles_parent(user_id)
 
     if not profiles:
         st.info(
@@ -897,116 +1298,127 @@ def render_child_selection() -> None:
         return
 
     st.subheader("Your Child Profiles")
+    if role == "therapist":
+        # Two queries for all cards instead of two per card
+        profile_ids = tuple(p["id"] for p in profiles)
+        parents_by_profile = _cached_parents(profile_ids)
+        invites_by_profile = _cached_invites(profile_ids)
     for profile in profiles:
-        with st.container():
-            st.markdown("---")
-            st.markdown(
-                f"""
-                <div class="profile-shell">
-                    <div class="badge">🎯 Default Target · {profile.get('default_target_mood', 'calm').title()}</div>
-                    <h3>{profile['child_name']}</h3>
-                    <p class="meta">
-                        {(f"Date of Birth: {profile['dob']} · " if profile.get("dob") else "")}
-                        Managed by therapist workspace
-                    </p>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-            # Show change target mood selector if therapist
-            if st.session_state["user_role"] == "therapist":
-                current_target = profile.get('default_target_mood', 'calm')
-                
-                change_col1, change_col2 = st.columns([2, 1])
-                with change_col1:
-                    new_target = st.selectbox(
-                        "Change Target Mood:",
-                        TARGET_MOODS,
-                        index=TARGET_MOODS.index(current_target) if current_target in TARGET_MOODS else 0,
-                        key=f"target_mood_select_{profile['id']}"
-                    )
-                with change_col2:
-                    st.write("")  # Spacer
-                    st.write("")  # Spacer to align button
-                    if st.button("💾 Update", key=f"update_target_{profile['id']}", type="primary"):
-                        if new_target != current_target:
-                            success = database.update_target_mood(profile['id'], new_target, user_id)
-                            if success:
-                                st.success(f"✅ Target mood changed to **{new_target.title()}**")
-                                # Clear emotion path to force recalculation in next session
-                                if st.session_state.get("active_profile_id") == profile['id']:
-                                    for key in ["emotion_path", "current_playlist", "current_from", "current_to"]:
-                                        st.session_state.pop(key, None)
-                                st.rerun()
-                            else:
-                                st.error("Failed to update target mood.")
-                        else:
-                            st.info("Target mood is already set to this value.")
+        # Divider and card in one element
+        st.markdown(
+            PROFILE_CARD_TEMPLATE.format_map({
+                "target": profile.get('default_target_mood', 'calm').title(),
+                "name": profile['child_name'],
+                "dob": f"Date of Birth: {profile['dob']} · " if profile.get("dob") else "",
+            }),
+            unsafe_allow_html=True,
+        )
+        # Show change target mood selector if therapist
+        if role == "therapist":
+            current_target = profile.get('default_target_mood', 'calm')
             
-            cols = st.columns([1, 1, 1.3])
-            with cols[0]:
-                if st.button("Open Profile", key=f"select_profile_{profile['id']}"):
-                    set_active_profile(profile)
-                    trigger_rerun()
+            change_col1, change_col2 = st.columns([2, 1])
+            with change_col1:
+                new_target = st.selectbox(
+                    "Change Target Mood:",
+                    TARGET_MOODS,
+                    index=TARGET_MOOD_INDEX.get(current_target, 0),
+                    key=f"target_mood_select_{profile['id']}"
+                )
+            with change_col2:
+                st.write("")  # Spacer
+                st.write("")  # Spacer to align button
+                if st.button("💾 Update", key=f"update_target_{profile['id']}", type="primary"):
+                    if new_target != current_target:
+                        success = database.update_target_mood(profile['id'], new_target, user_id)
+                        if success:
+                            invalidate_profile_cache()
+                            st.success(f"✅ Target mood changed to **{new_target.title()}**")
+                            # Clear emotion path to force recalculation in next session
+                            if st.session_state.get("active_profile_id") == profile['id']:
+                                for key in ["emotion_path", "current_playlist", "current_from", "current_to"]:
+                                    st.session_state.pop(key, None)
+                            st.rerun()
+                        else:
+                            st.error("Failed to update target mood.")
+                    else:
+                        st.info("Target mood is already set to this value.")
+        
+        cols = st.columns([1, 1, 1.3])
+        with cols[0]:
+            # As a callback this runs before the script, so the click reruns straight
+            # into the profile view instead of redrawing this list first
+            st.button(
+                "Open Profile",
+                key=f"select_profile_{profile['id']}",
+                on_click=set_active_profile,
+                args=(profile,),
+            )
+        
+        if role == "therapist":
+            with cols[1]:
+                if st.button("🗑️ Delete", key=f"delete_profile_{profile['id']}", type="secondary"):
+                    # Store profile ID to confirm deletion
+                    st.session_state[f"confirm_delete_{profile['id']}"] = True
+                    st.rerun()
             
-            if st.session_state["user_role"] == "therapist":
-                with cols[1]:
-                    if st.button("🗑️ Delete", key=f"delete_profile_{profile['id']}", type="secondary"):
-                        # Store profile ID to confirm deletion
-                        st.session_state[f"confirm_delete_{profile['id']}"] = True
-                        st.rerun()
+            # Show confirmation dialog if delete was clicked
+            if st.session_state.get(f"confirm_delete_{profile['id']}", False):
+                st.warning(f"⚠️ **Are you sure you want to delete {profile['child_name']}'s profile?**")
+                st.caption("This will permanently delete all session history, invitations, and parent access.")
                 
-                # Show confirmation dialog if delete was clicked
-                if st.session_state.get(f"confirm_delete_{profile['id']}", False):
-                    st.warning(f"⚠️ **Are you sure you want to delete {profile['child_name']}'s profile?**")
-                    st.caption("This will permanently delete all session history, invitations, and parent access.")
-                    
-                    confirm_cols = st.columns([1, 1, 2])
-                    with confirm_cols[0]:
-                        if st.button("✅ Yes, Delete", key=f"confirm_yes_{profile['id']}", type="primary"):
-                            success = database.delete_profile(profile['id'], user_id)
-                            if success:
-                                st.success(f"Profile for {profile['child_name']} has been deleted.")
-                                # Clear confirmation state
-                                st.session_state.pop(f"confirm_delete_{profile['id']}", None)
-                                # If this was the active profile, clear it
-                                if st.session_state.get("active_profile_id") == profile['id']:
-                                    st.session_state.pop("active_profile_id", None)
-                                st.rerun()
-                            else:
-                                st.error("Failed to delete profile. You may not have permission.")
-                    with confirm_cols[1]:
-                        if st.button("❌ Cancel", key=f"confirm_no_{profile['id']}"):
+                confirm_cols = st.columns([1, 1, 2])
+                with confirm_cols[0]:
+                    if st.button("✅ Yes, Delete", key=f"confirm_yes_{profile['id']}", type="primary"):
+                        success = database.delete_profile(profile['id'], user_id)
+                        if success:
+                            invalidate_profile_cache()
+                            invalidate_history_cache()
+                            st.success(f"Profile for {profile['child_name']} has been deleted.")
+                            # Clear confirmation state
                             st.session_state.pop(f"confirm_delete_{profile['id']}", None)
+                            # If this was the active profile, clear it
+                            if st.session_state.get("active_profile_id") == profile['id']:
+                                st.session_state.pop("active_profile_id", None)
                             st.rerun()
-                
-                with cols[2]:
-                    parents = database.get_parents_for_profile(profile["id"])
-                    if parents:
-                        st.markdown(
-                            "**Connected Parents:** " + ", ".join(p.get("name") or p["email"] for p in parents)
+                        else:
+                            st.error("Failed to delete profile. You may not have permission.")
+                with confirm_cols[1]:
+                    if st.button("❌ Cancel", key=f"confirm_no_{profile['id']}"):
+                        st.session_state.pop(f"confirm_delete_{profile['id']}", None)
+                        st.rerun()
+            
+            with cols[2]:
+                parents = parents_by_profile.get(profile["id"], [])
+                invites = invites_by_profile.get(profile["id"], [])
+                pending = [invite for invite in invites if invite["status"] == "pending"]
+                summary = []
+                if parents:
+                    summary.append(
+                        "**Connected Parents:** " + ", ".join(p.get("name") or p["email"] for p in parents)
+                    )
+                if pending:
+                    summary.append("_Pending invitations:_")
+                if summary:
+                    st.markdown("\n\n".join(summary))
+                for invite in pending:
+                    st.code(invite["token"], language=None)
+                    st.caption(f"Shared with {invite['email']}")
+                with st.expander(f"Invite for {profile['child_name']}"):
+                    with st.form(f"invite_form_{profile['id']}"):
+                        email = st.text_input(
+                            "Parent / Guardian Email",
+                            key=f"invite_email_{profile['id']}",
                         )
-                    invites = database.list_invites_for_profile(profile["id"])
-                    pending = [invite for invite in invites if invite["status"] == "pending"]
-                    if pending:
-                        st.markdown("_Pending invitations:_")
-                        for invite in pending:
-                            st.code(invite["token"], language=None)
-                            st.caption(f"Shared with {invite['email']}")
-                    with st.expander(f"Invite for {profile['child_name']}"):
-                        with st.form(f"invite_form_{profile['id']}"):
-                            email = st.text_input(
-                                "Parent / Guardian Email",
-                                key=f"invite_email_{profile['id']}",
-                            )
-                            submit_invite = st.form_submit_button("Generate Invitation Code")
-                            if submit_invite:
-                                if not email:
-                                    st.error("Parent email is required to generate an invite.")
-                                else:
-                                    token = database.create_parent_invite(profile["id"], email)
-                                    st.success("Invitation code created. Share it securely with the parent/guardian.")
-                                    st.code(token, language=None)
+                        submit_invite = st.form_submit_button("Generate Invitation Code")
+                        if submit_invite:
+                            if not email:
+                                st.error("Parent email is required to generate an invite.")
+                            else:
+                                token = database.create_parent_invite(profile["id"], email)
+                                _cached_invites.clear()
+                                st.success("Invitation code created. Share it securely with the parent/guardian.")
+                                st.code(token, language=None)
 
 
 def render_new_session(profile: Dict[str, Any]) -> None:
@@ -1014,6 +1426,14 @@ def render_new_session(profile: Dict[str, Any]) -> None:
     st.caption(
         "Detect the child's mood and receive a personalized therapeutic music playlist."
     )
+
+    # Messages left by end_journey() before it reran the page
+    notice = st.session_state.pop("session_notice", None)
+    if notice:
+        if notice["celebrate"]:
+            st.balloons()
+        for level, message in notice["messages"]:
+            getattr(st, level)(message)
     
     # Add helpful notice about detection methods
     with st.expander("ℹ️ About Mood Detection Methods", expanded=False):
@@ -1038,6 +1458,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
         - Perfect backup option
         """)
 
+    engine = get_music_engine()
     if not engine.is_ready():
         st.warning(
             "MuSe dataset not found or invalid. Place 'muse_v3.csv' in the project root to enable recommendations."
@@ -1052,6 +1473,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
         # Clear journey tracking for fresh start
         st.session_state.pop("emotion_path", None)
         st.session_state.pop("current_playlist", None)
+        st.session_state.pop("current_playlist_json", None)
         st.session_state.pop("current_from", None)
         st.session_state.pop("current_to", None)
         st.session_state["current_transition_step"] = 0
@@ -1062,11 +1484,19 @@ def render_new_session(profile: Dict[str, Any]) -> None:
         # Clear journey tracking for fresh start
         st.session_state.pop("emotion_path", None)
         st.session_state.pop("current_playlist", None)
+        st.session_state.pop("current_playlist_json", None)
         st.session_state.pop("current_from", None)
         st.session_state.pop("current_to", None)
         st.session_state["current_transition_step"] = 0
 
     mode = st.session_state.get("mode")
+    if mode != "webcam":
+        # Realtime detection is off the page; don't leave its worker running
+        stop_frame_analyzer()
+    if mode is None:
+        # Nothing chosen yet (or the journey was reset); a stale detected_mood
+        # left behind by "Change Target Mood" must not re-render the playlist
+        return
 
     if mode == "manual":
         st.subheader("Manual Mood Input")
@@ -1078,6 +1508,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
         if st.button("Get Recommendation", key="manual_get_recommendation"):
             st.session_state["detected_mood"] = manual_mood
     elif mode == "webcam":
+        load_webcam_stack()
         st.subheader("Webcam Mood Detection")
         
         # Add option to choose between real-time and snapshot mode
@@ -1093,6 +1524,9 @@ def render_new_session(profile: Dict[str, Any]) -> None:
         realtime_available = webrtc_streamer is not None and av is not None
         detector_available = analyze_frame is not None
 
+        if use_snapshot:
+            stop_frame_analyzer()
+
         if not use_snapshot and realtime_available and detector_available:
             emotion_queue = st.session_state.get("_emotion_queue")
             if not isinstance(emotion_queue, Queue):
@@ -1103,51 +1537,47 @@ def render_new_session(profile: Dict[str, Any]) -> None:
             if "_emotion_history" not in st.session_state:
                 st.session_state["_emotion_history"] = []
             
-            # Use a module-level variable for throttling (callbacks can't use session state reliably)
-            import time
-            from collections import Counter
-            _last_analysis = {"time": 0}
+            # One detection worker per browser session; it outlives individual reruns
+            analyzer = st.session_state.get("_frame_analyzer")
+            if not isinstance(analyzer, FrameAnalyzer):
+                analyzer = FrameAnalyzer(analyze_frame, emotion_queue, normalize_fn=normalize_emotion)
+                st.session_state["_frame_analyzer"] = analyzer
+            analyzer.emotion_queue = emotion_queue
             
             def video_frame_callback(frame: "av.VideoFrame") -> "av.VideoFrame":  # type: ignore[name-defined]
+                # Throttle emotion detection; the analyzer keeps its counters across reruns
+                sample = analyzer.should_sample()
+                emotion = analyzer.last_emotion
+                draw_overlay = bool(emotion) and cv2 is not None
+                if not (sample or draw_overlay):
+                    # Nothing to analyze or draw: pass the frame through without conversion
+                    return frame
+
+                if not draw_overlay:
+                    # Sample only: decode straight to analysis size, skipping the full-size BGR frame
+                    analyzer.submit(decode_for_analysis(frame))
+                    return frame
+
                 av_frame = frame.to_ndarray(format="bgr24")
-                
-                # Throttle emotion detection: analyze every 1 second for more responsive detection
-                current_time = time.time()
-                if current_time - _last_analysis["time"] >= 1.0:  # Analyze once per second
-                    _last_analysis["time"] = current_time
-                    emotion = analyze_frame(av_frame)
-                    if emotion:
-                        emotion = normalize_emotion(emotion)
-                        if emotion:
-                            print(f"[app.py] Adding to queue: {emotion}")
-                            try:
-                                emotion_queue.put_nowait(emotion)
-                                print(f"[app.py] Queue size: {emotion_queue.qsize()}")
-                            except Full:
-                                # Remove oldest and add new
-                                try:
-                                    emotion_queue.get_nowait()
-                                    emotion_queue.put_nowait(emotion)
-                                    print(f"[app.py] Queue was full, replaced oldest")
-                                except:
-                                    pass
-                            if cv2 is not None:
-                                cv2.putText(
-                                    av_frame,
-                                    emotion.title(),
-                                    (10, 30),
-                                    cv2.FONT_HERSHEY_SIMPLEX,
-                                    1.0,
-                                    (0, 255, 0),
-                                    2,
-                                    cv2.LINE_AA,
-                                )
-                        else:
-                            print(f"[app.py] normalize_emotion returned None for: {emotion}")
-                    else:
-                        print(f"[app.py] analyze_frame returned None")
-                
-                return av.VideoFrame.from_ndarray(av_frame, format="bgr24")
+                if sample:
+                    # Hand a small private copy to the worker; the overlay below draws on av_frame
+                    analyzer.submit(downscale_for_analysis(av_frame))
+
+                cv2.putText(
+                    av_frame,
+                    emotion.title(),
+                    (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    1.0,
+                    (0, 255, 0),
+                    2,
+                    cv2.LINE_AA,
+                )
+                annotated = av.VideoFrame.from_ndarray(av_frame, format="bgr24")
+                # Keep the source timing so the encoder doesn't re-pace the stream
+                annotated.pts = frame.pts
+                annotated.time_base = frame.time_base
+                return annotated
 
             st.warning(
                 "⚠️ **Real-time video may have connection issues.** "
@@ -1176,8 +1606,10 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                     video_frame_callback=video_frame_callback,
                     media_stream_constraints={
                         "video": {
-                            "width": {"ideal": 640, "max": 1280},
-                            "height": {"ideal": 480, "max": 720},
+                            # Detection works on ANALYSIS_MAX_WIDTH-wide frames; asking for
+                            # that size up front saves decode and transfer work per frame
+                            "width": {"ideal": ANALYSIS_MAX_WIDTH, "max": 640},
+                            "height": {"ideal": 240, "max": 480},
                             "frameRate": {"ideal": 10, "max": 15}  # Lower framerate for better stability
                         },
                         "audio": False
@@ -1190,7 +1622,6 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                 ctx = None
             if ctx and ctx.state.playing:
                 # Collect all detected emotions from queue
-                from collections import Counter
                 emotions_batch = []
                 while True:
                     try:
@@ -1224,7 +1655,6 @@ def render_new_session(profile: Dict[str, Any]) -> None:
             elif not ctx or not ctx.state.playing:
                 # When webcam stops, finalize emotion using history
                 if st.session_state.get("_emotion_history"):
-                    from collections import Counter
                     emotion_counts = Counter(st.session_state["_emotion_history"])
                     final_emotion = emotion_counts.most_common(1)[0][0]
                     if st.session_state.get("last_detected_emotion") != final_emotion:
@@ -1275,10 +1705,10 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                 # Only process if this is a new snapshot
                 if current_snapshot_key != last_processed_key:
                     try:
-                        image = Image.open(snapshot)
+                        # Full resolution: a single user-initiated capture, so keep
+                        # every bit of face detail for the detector
+                        image = Image.open(snapshot).convert("RGB")
                         frame_rgb = np.array(image)
-                        if frame_rgb.ndim == 2:  # grayscale fallback
-                            frame_rgb = np.stack([frame_rgb] * 3, axis=-1)
                         # Convert RGB to BGR for OpenCV convention (analyze_frame expects BGR)
                         frame_bgr = frame_rgb[:, :, ::-1]
                         
@@ -1311,6 +1741,9 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                     st.session_state["_last_snapshot_key"] = None
                     st.session_state["_emotion_history"] = []
                     st.session_state["detected_mood"] = None
+                    analyzer = st.session_state.get("_frame_analyzer")
+                    if isinstance(analyzer, FrameAnalyzer):
+                        analyzer.reset()
                     # Clear the queue as well (only if it exists)
                     emotion_queue = st.session_state.get("_emotion_queue")
                     if emotion_queue is not None and isinstance(emotion_queue, Queue):
@@ -1341,6 +1774,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                 # Clear old journey data to force recalculation with new mood
                 st.session_state.pop("emotion_path", None)
                 st.session_state.pop("current_playlist", None)
+                st.session_state.pop("current_playlist_json", None)
                 st.session_state.pop("current_from", None)
                 st.session_state.pop("current_to", None)
                 st.session_state["current_transition_step"] = 0
@@ -1374,6 +1808,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                     # Clear journey tracking for fresh start
                     st.session_state.pop("emotion_path", None)
                     st.session_state.pop("current_playlist", None)
+                    st.session_state.pop("current_playlist_json", None)
                     st.session_state.pop("current_from", None)
                     st.session_state.pop("current_to", None)
                     st.session_state["current_transition_step"] = 0
@@ -1384,6 +1819,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                     # Clear journey tracking for fresh start
                     st.session_state.pop("emotion_path", None)
                     st.session_state.pop("current_playlist", None)
+                    st.session_state.pop("current_playlist_json", None)
                     st.session_state.pop("current_from", None)
                     st.session_state.pop("current_to", None)
                     st.session_state["current_transition_step"] = 0
@@ -1489,7 +1925,7 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                 num_steps=5,
                 tolerance=0.1,
             )
-            st.session_state["current_playlist"] = playlist_df
+            store_playlist(playlist_df)
             st.session_state["emotion_path"] = emotion_path  # Store for feedback
             st.session_state["current_from"] = current_from  # Store current transition
             st.session_state["current_to"] = current_to
@@ -1511,222 +1947,226 @@ def render_new_session(profile: Dict[str, Any]) -> None:
                 progress_text = f" (Step {current_step + 1} of {len(emotion_path) - 1})"
             
             st.subheader(f"🎵 Curated Playlist: {current_from.title()} → {current_to.title()}{progress_text}")
-            for _, row in playlist_df.iterrows():
-                track = row.get("track", "Unknown Track")
-                artist = row.get("artist", "Unknown Artist")
-                spotify_id = row.get("spotify_id")
-                st.write(f"{track} by {artist}")
-                if spotify_id:
-                    embed_url = f"https://open.spotify.com/embed/track/{spotify_id}"
-                    iframe = (
-                        f'<iframe src="{embed_url}" width="100%" height="80" frameborder="0" '
-                        f'allowtransparency="true" allow="encrypted-media"></iframe>'
-                    )
-                    st.markdown(iframe, unsafe_allow_html=True)
+            # Build the whole playlist as one HTML block: one element instead of two per track
+            tracks = playlist_df.reindex(columns=["track", "artist", "spotify_id"]).fillna(
+                {"track": "Unknown Track", "artist": "Unknown Artist", "spotify_id": ""}
+            )
+            names = (
+                "<p>" + tracks["track"].astype(str).map(html.escape)
+                + " by " + tracks["artist"].astype(str).map(html.escape) + "</p>"
+            )
+            spotify_ids = tracks["spotify_id"].astype(str)
+            embeds = spotify_ids.map(SPOTIFY_EMBED_TEMPLATE.format).where(spotify_ids != "", "")
+            playlist_html = (names + embeds).str.cat(sep="\n")
+            st.markdown(playlist_html, unsafe_allow_html=True)
+
+            render_session_feedback(profile, emotion_path, current_from, current_to, target_mood)
+
+
+def end_journey(messages: List[Tuple[str, str]], celebrate: bool = False) -> None:
+    """
+    Reset the mood journey and rerun the whole page.
+
+    Called from the feedback fragment, whose own reruns would leave the outer
+    playlist (and the fragment's bound arguments) stale. The messages are
+    shown by render_new_session after the rerun.
+    """
+    st.session_state["detected_mood"] = None
+    st.session_state["mode"] = None
+    st.session_state["last_detected_emotion"] = None
+    for key in ("current_playlist", "current_playlist_json", "current_from", "current_to", "emotion_path"):
+        st.session_state.pop(key, None)
+    st.session_state["current_transition_step"] = 0
+    st.session_state["regeneration_count"] = 0
+    stop_frame_analyzer()
+    st.session_state["session_notice"] = {"messages": messages, "celebrate": celebrate}
+    st.rerun()
 
-            st.subheader("How did this session go?")
-            st.caption("Your feedback helps us adjust the therapy progression")
+
+# Fall back to a plain call on Streamlit releases without fragments
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda fn: fn)
+
+
+@_fragment
+def render_session_feedback(
+    profile: Dict[str, Any],
+    emotion_path: List[str],
+    current_from: str,
+    current_to: str,
+    target_mood: str,
+) -> None:
+    """
+    Feedback controls for the current playlist.
+
+    Runs as a fragment so a click here doesn't rerun the sidebar, profile
+    lookups and journey plan; every branch that changes the journey or
+    playlist ends in st.rerun() (directly or via end_journey) so the outer
+    page never shows a stale playlist.
+    """
+    engine = get_music_engine()
+
+    st.subheader("How did this session go?")
+    st.caption("Your feedback helps us adjust the therapy progression")
+    
+    # Use dynamic keys that include the current step to prevent button state persistence
+    current_step_for_key = st.session_state.get("current_transition_step", 0)
+    regen_count = st.session_state.get("regeneration_count", 0)
+    button_suffix = f"_step{current_step_for_key}_regen{regen_count}"
+    
+    # Clear Session button
+    if st.button("🔄 Clear Session & Start New", key=f"clear_session{button_suffix}", type="secondary", use_container_width=True):
+        end_journey([("success", "✅ Session cleared! Starting fresh...")])
+    
+    c1, c2, c3 = st.columns(3)
+    feedback = None
+    if c1.button("😞 Not Effective", key=f"feedback_sad{button_suffix}", use_container_width=True):
+        feedback = "sad"
+    if c2.button("😐 Neutral", key=f"feedback_neutral{button_suffix}", use_container_width=True):
+        feedback = "neutral"
+    if c3.button("😊 Great", key=f"feedback_happy{button_suffix}", use_container_width=True):
+        feedback = "happy"
+
+    if feedback is not None:
+        # Save session to database
+        playlist_json = st.session_state.get("current_playlist_json") or serialize_playlist(
+            st.session_state["current_playlist"]
+        )
+        database.save_session(
+            profile_id=profile["id"],
+            start_mood=current_from,
+            target_mood=current_to,
+            feedback_emoji=feedback,
+            playlist_json=playlist_json,
+        )
+        invalidate_history_cache()
+        
+        # Smart feedback handling based on ISO principle
+        if feedback in ["sad", "neutral"]:
+            # Negative/neutral feedback: Regenerate playlist for same transition
+            st.warning(
+                f"📝 **Feedback recorded:** The transition from **{current_from.title()}** to **{current_to.title()}** "
+                f"needs adjustment. Let's try a different playlist for the same transition."
+            )
+            st.info(
+                "💡 **What's happening:** We'll generate a new set of songs for this same emotional transition. "
+                "The therapeutic goal remains the same, but with different music that might work better."
+            )
             
-            # Use dynamic keys that include the current step to prevent button state persistence
-            current_step_for_key = st.session_state.get("current_transition_step", 0)
-            regen_count = st.session_state.get("regeneration_count", 0)
-            button_suffix = f"_step{current_step_for_key}_regen{regen_count}"
+            # Regenerate playlist with different random state
+            import random
+            new_random_state = random.randint(1, 10000)
             
-            # Clear Session button
-            if st.button("🔄 Clear Session & Start New", key=f"clear_session{button_suffix}", type="secondary", use_container_width=True):
-                # Reset all session state
-                st.session_state["detected_mood"] = None
-                st.session_state["mode"] = None
-                st.session_state["last_detected_emotion"] = None
-                st.session_state.pop("current_playlist", None)
-                st.session_state.pop("current_from", None)
-                st.session_state.pop("current_to", None)
-                st.session_state.pop("emotion_path", None)
-                st.session_state["current_transition_step"] = 0
-                st.session_state["regeneration_count"] = 0
-                st.success("✅ Session cleared! Starting fresh...")
+            # Store regeneration flag for UI message
+            st.session_state["playlist_regenerated"] = True
+            st.session_state["regeneration_count"] = st.session_state.get("regeneration_count", 0) + 1
+            
+            new_playlist = generate_playlist(
+                music_engine=engine,
+                start_emotion=current_from,
+                target_emotion=current_to,
+                num_steps=5,
+                tolerance=0.1,
+                random_state=new_random_state
+            )
+            
+            if not new_playlist.empty:
+                store_playlist(new_playlist)
+                st.success(
+                    f"✨ **New playlist generated!** (Attempt #{st.session_state['regeneration_count']})\n\n"
+                    f"We've created a different set of songs for the transition from **{current_from.title()}** to **{current_to.title()}**."
+                )
+                # Rerun to display the new playlist
                 st.rerun()
+            else:
+                # Reset for new session
+                end_journey([("error", "Could not generate alternative playlist. Please try manual input.")])
+        
+        elif feedback == "happy":
+            # Positive feedback: Move to next transition
+            current_step = st.session_state.get("current_transition_step", 0)
+            next_step = current_step + 1
             
-            c1, c2, c3 = st.columns(3)
-            feedback = None
-            if c1.button("😞 Not Effective", key=f"feedback_sad{button_suffix}", use_container_width=True):
-                feedback = "sad"
-            if c2.button("😐 Neutral", key=f"feedback_neutral{button_suffix}", use_container_width=True):
-                feedback = "neutral"
-            if c3.button("😊 Great", key=f"feedback_happy{button_suffix}", use_container_width=True):
-                feedback = "happy"
-
-            if feedback is not None:
-                # Save session to database
-                playlist_json = st.session_state["current_playlist"].to_json()
-                database.save_session(
-                    profile_id=profile["id"],
-                    start_mood=current_from,
-                    target_mood=current_to,
-                    feedback_emoji=feedback,
-                    playlist_json=playlist_json,
+            # Check if there are more transitions
+            if next_step < len(emotion_path) - 1:
+                # Move to next transition
+                st.session_state["current_transition_step"] = next_step
+                next_from = emotion_path[next_step]
+                next_to = emotion_path[next_step + 1]
+                
+                st.success(
+                    f"🎉 **Great progress!** You've successfully transitioned from **{current_from.title()}** to **{current_to.title()}**."
+                )
+                st.info(
+                    f"🎯 **Moving to next step:** We're now shifting from **{next_from.title()}** to **{next_to.title()}**.\n\n"
+                    f"**Progress:** Step {next_step + 1} of {len(emotion_path) - 1} in your journey to **{target_mood.title()}**"
                 )
                 
-                # Smart feedback handling based on ISO principle
-                if feedback in ["sad", "neutral"]:
-                    # Negative/neutral feedback: Regenerate playlist for same transition
-                    st.warning(
-                        f"📝 **Feedback recorded:** The transition from **{current_from.title()}** to **{current_to.title()}** "
-                        f"needs adjustment. Let's try a different playlist for the same transition."
-                    )
-                    st.info(
-                        "💡 **What's happening:** We'll generate a new set of songs for this same emotional transition. "
-                        "The therapeutic goal remains the same, but with different music that might work better."
-                    )
-                    
-                    # Regenerate playlist with different random state
-                    import random
-                    new_random_state = random.randint(1, 10000)
-                    
-                    # Store regeneration flag for UI message
-                    st.session_state["playlist_regenerated"] = True
-                    st.session_state["regeneration_count"] = st.session_state.get("regeneration_count", 0) + 1
-                    
-                    new_playlist = generate_playlist(
-                        music_engine=engine,
-                        start_emotion=current_from,
-                        target_emotion=current_to,
-                        num_steps=5,
-                        tolerance=0.1,
-                        random_state=new_random_state
-                    )
-                    
-                    if not new_playlist.empty:
-                        st.session_state["current_playlist"] = new_playlist
-                        st.success(
-                            f"✨ **New playlist generated!** (Attempt #{st.session_state['regeneration_count']})\n\n"
-                            f"We've created a different set of songs for the transition from **{current_from.title()}** to **{current_to.title()}**."
-                        )
-                        # Rerun to display the new playlist
-                        st.rerun()
-                    else:
-                        st.error("Could not generate alternative playlist. Please try manual input.")
-                        # Reset for new session
-                        st.session_state["detected_mood"] = None
-                        st.session_state["mode"] = None
-                        st.session_state["last_detected_emotion"] = None
-                        st.session_state.pop("current_playlist", None)
-                        st.session_state["regeneration_count"] = 0
+                # Generate playlist for next transition
+                next_playlist = generate_playlist(
+                    music_engine=engine,
+                    start_emotion=next_from,
+                    target_emotion=next_to,
+                    num_steps=5,
+                    tolerance=0.1,
+                )
                 
-                elif feedback == "happy":
-                    # Positive feedback: Move to next transition
-                    current_step = st.session_state.get("current_transition_step", 0)
-                    next_step = current_step + 1
+                if not next_playlist.empty:
+                    # Update session state for next transition
+                    store_playlist(next_playlist)
+                    st.session_state["detected_mood"] = next_from  # Update current mood
+                    st.session_state["current_from"] = next_from  # Store new transition
+                    st.session_state["current_to"] = next_to
+                    # Reset regeneration counter for new transition
+                    st.session_state["regeneration_count"] = 0
+                    st.session_state["playlist_regenerated"] = False
                     
-                    # Check if there are more transitions
-                    if next_step < len(emotion_path) - 1:
-                        # Move to next transition
-                        st.session_state["current_transition_step"] = next_step
-                        next_from = emotion_path[next_step]
-                        next_to = emotion_path[next_step + 1]
-                        
-                        st.success(
-                            f"🎉 **Great progress!** You've successfully transitioned from **{current_from.title()}** to **{current_to.title()}**."
-                        )
-                        st.info(
-                            f"🎯 **Moving to next step:** We're now shifting from **{next_from.title()}** to **{next_to.title()}**.\n\n"
-                            f"**Progress:** Step {next_step + 1} of {len(emotion_path) - 1} in your journey to **{target_mood.title()}**"
-                        )
-                        
-                        # Generate playlist for next transition
-                        next_playlist = generate_playlist(
-                            music_engine=engine,
-                            start_emotion=next_from,
-                            target_emotion=next_to,
-                            num_steps=5,
-                            tolerance=0.1,
-                        )
-                        
-                        if not next_playlist.empty:
-                            # Update session state for next transition
-                            st.session_state["current_playlist"] = next_playlist
-                            st.session_state["detected_mood"] = next_from  # Update current mood
-                            st.session_state["current_from"] = next_from  # Store new transition
-                            st.session_state["current_to"] = next_to
-                            # Reset regeneration counter for new transition
-                            st.session_state["regeneration_count"] = 0
-                            st.session_state["playlist_regenerated"] = False
-                            
-                            st.success(
-                                f"✅ **Playlist generated for next transition!**\n\n"
-                                f"Moving from **{next_from.title()}** to **{next_to.title()}**"
-                            )
-                            # Rerun to display the new playlist with feedback buttons
-                            st.rerun()
-                        else:
-                            st.error("Could not generate next playlist. Starting new session.")
-                            # Reset everything
-                            st.session_state["detected_mood"] = None
-                            st.session_state["mode"] = None
-                            st.session_state["last_detected_emotion"] = None
-                            st.session_state.pop("current_playlist", None)
-                            st.session_state.pop("current_from", None)
-                            st.session_state.pop("current_to", None)
-                            st.session_state.pop("emotion_path", None)
-                            st.session_state["current_transition_step"] = 0
-                            st.session_state["regeneration_count"] = 0
-                    
-                    else:
-                        # Journey complete!
-                        st.balloons()
-                        st.success(
+                    st.success(
+                        f"✅ **Playlist generated for next transition!**\n\n"
+                        f"Moving from **{next_from.title()}** to **{next_to.title()}**"
+                    )
+                    # Rerun to display the new playlist with feedback buttons
+                    st.rerun()
+                else:
+                    # Reset everything
+                    end_journey([("error", "Could not generate next playlist. Starting new session.")])
+            
+            else:
+                # Journey complete! Reset for new session
+                end_journey(
+                    [
+                        (
+                            "success",
                             f"🎊 **Journey Complete!** You've successfully reached your target mood: **{target_mood.title()}**\n\n"
-                            f"You've completed all {len(emotion_path) - 1} transition(s) in your therapeutic journey."
-                        )
-                        st.info(
+                            f"You've completed all {len(emotion_path) - 1} transition(s) in your therapeutic journey.",
+                        ),
+                        (
+                            "info",
                             "✨ **Well done!** You can now:\n"
                             "- Start a new session\n"
                             "- View your progress in the Dashboard\n"
-                            "- Set a new target mood"
-                        )
-                        
-                        # Reset for new session
-                        st.session_state["detected_mood"] = None
-                        st.session_state["mode"] = None
-                        st.session_state["last_detected_emotion"] = None
-                        st.session_state.pop("current_playlist", None)
-                        st.session_state.pop("current_from", None)
-                        st.session_state.pop("current_to", None)
-                        st.session_state.pop("emotion_path", None)
-                        st.session_state["current_transition_step"] = 0
-                        st.session_state["regeneration_count"] = 0
+                            "- Set a new target mood",
+                        ),
+                    ],
+                    celebrate=True,
+                )
 
 
 def render_progress_dashboard(profile: Dict[str, Any]) -> None:
     st.title(f"Progress Dashboard — {profile['child_name']}")
 
-    # Force fresh data fetch - no caching
-    history_df = database.get_history(profile["id"])
+    # Cached and preprocessed per profile; save_session clears it so new
+    # feedback shows up immediately. Treat it as read-only.
+    history_df = _cached_history(profile["id"])
     if history_df.empty:
         st.info("No session history yet.")
         return
 
-    history_df = history_df.copy()
-    history_df["timestamp"] = pd.to_datetime(history_df["timestamp"])
-    # Convert to IST (Indian Standard Time - UTC+5:30)
-    try:
-        # Try to localize to UTC and convert to Asia/Kolkata
-        if history_df["timestamp"].dt.tz is None:
-            history_df["timestamp"] = history_df["timestamp"].dt.tz_localize('UTC').dt.tz_convert('Asia/Kolkata')
-        else:
-            history_df["timestamp"] = history_df["timestamp"].dt.tz_convert('Asia/Kolkata')
-    except Exception:
-        # Fallback: manually add 5:30 hours if timezone conversion fails
-        import datetime
-        history_df["timestamp"] = history_df["timestamp"] + pd.Timedelta(hours=5, minutes=30)
-    history_df.sort_values("timestamp", inplace=True)
-
-    total_sessions = len(history_df)
-    last_session = history_df["timestamp"].max()
-    positive_feedback = history_df["feedback_emoji"].str.lower().eq("happy").sum()
-    positive_pct = int(round((positive_feedback / total_sessions) * 100)) if total_sessions else 0
-    target_mode = history_df["target_mood"].dropna()
-    top_target = target_mode.mode().iat[0].title() if not target_mode.empty else "Calm"
+    # Headline numbers are aggregated alongside the chart inputs, once per profile
+    summary = _cached_history_summary(profile["id"])
+    total_sessions = summary["total_sessions"]
+    last_session = summary["last_session"]
+    positive_pct = summary["positive_pct"]
+    top_target = summary["top_target"]
 
     insights_html = f"""
     <div class="insights-grid">
@@ -1760,126 +2200,17 @@ def render_progress_dashboard(profile: Dict[str, Any]) -> None:
     current_theme = st.session_state.get("theme", "dark")
     is_light_theme = current_theme == "light"
     
-    # Theme-adaptive colors
-    if is_light_theme:
-        text_color = "#0f172a"
-        grid_color = "#cbd5e1"
-        spine_color = "#94a3b8"
-        bg_color = (0.97, 0.98, 0.99, 0.5)  # RGBA tuple for light background
-        empty_text_color = "#64748b"
-    else:
-        text_color = "white"
-        grid_color = "white"
-        spine_color = "white"
-        bg_color = (0, 0, 0, 0)  # Transparent RGBA tuple
-        empty_text_color = "white"
-    
     # Success Rate Trend - Simple and clear for therapists
     with chart_cols[0]:
         st.markdown('<div class="chart-frame"><h4>Session Success Trend</h4>', unsafe_allow_html=True)
-        # Calculate rolling success rate (positive feedback over last 5 sessions)
-        history_df['is_positive'] = history_df["feedback_emoji"].str.lower().eq("happy").astype(int)
-        history_df['rolling_success'] = history_df['is_positive'].rolling(window=min(5, len(history_df)), min_periods=1).mean() * 100
-        
-        # Use solid background instead of RGBA tuple for better compatibility
-        fig_bg = 'white' if is_light_theme else '#0e1117'
-        ax_bg = 'white' if is_light_theme else '#0e1117'
-        
-        fig, ax = plt.subplots(figsize=(6, 3.2), facecolor=fig_bg)
-        ax.set_facecolor(ax_bg)
-        
-        # Plot line with gradient effect
-        ax.plot(history_df["timestamp"], history_df['rolling_success'], 
-                color="#10b981", linewidth=3, marker="o", markersize=6, 
-                markerfacecolor="#10b981", markeredgecolor="white", markeredgewidth=2,
-                label="Success Rate", zorder=3)
-        ax.fill_between(history_df["timestamp"], history_df['rolling_success'], 
-                        color="#10b981", alpha=0.15, zorder=2)
-        
-        # Target line
-        ax.axhline(y=70, color='#f59e0b', linestyle='--', linewidth=2, 
-                   alpha=0.7, label='Target: 70%', zorder=1)
-        
-        ax.set_ylabel("Success Rate (%)", color=text_color, fontsize=11, fontweight=600)
-        ax.set_ylim(0, 105)
-        ax.grid(axis="y", linestyle="--", alpha=0.15, color=grid_color, linewidth=1)
-        ax.tick_params(axis="x", rotation=25, labelsize=9, colors=text_color)
-        ax.tick_params(axis="y", labelsize=10, colors=text_color)
-        ax.spines["top"].set_visible(False)
-        ax.spines["right"].set_visible(False)
-        ax.spines["bottom"].set_color(spine_color)
-        ax.spines["bottom"].set_linewidth(1.5)
-        ax.spines["left"].set_color(spine_color)
-        ax.spines["left"].set_linewidth(1.5)
-        
-        legend = ax.legend(loc='upper left', fontsize=9, framealpha=0.9)
-        if is_light_theme:
-            legend.get_frame().set_facecolor('white')
-        else:
-            legend.get_frame().set_facecolor('#262730')
-        legend.get_frame().set_edgecolor(spine_color)
-        
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+        st.image(_success_trend_png(profile["id"], is_light_theme))
         st.caption("📊 Rolling average of positive feedback (last 5 sessions)")
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Feedback Mix Pie Chart
     with chart_cols[1]:
         st.markdown('<div class="chart-frame"><h4>Feedback Distribution</h4>', unsafe_allow_html=True)
-        feedback_counts = history_df["feedback_emoji"].value_counts()
-        
-        # Use solid background
-        fig_bg = 'white' if is_light_theme else '#0e1117'
-        ax_bg = 'white' if is_light_theme else '#0e1117'
-        
-        fig, ax = plt.subplots(figsize=(4.5, 3.4), facecolor=fig_bg)
-        ax.set_facecolor(ax_bg)
-        
-        if feedback_counts.empty:
-            ax.axis("off")
-            ax.text(0.5, 0.5, "No feedback yet", ha="center", va="center", 
-                   fontsize=11, color=empty_text_color, fontweight=500)
-        else:
-            # Modern color palette
-            colors = ["#10b981", "#f59e0b", "#ef4444"]  # Emerald, Amber, Red
-            
-            wedges, texts, autotexts = ax.pie(
-                feedback_counts,
-                labels=[label.title() for label in feedback_counts.index],
-                autopct="%1.0f%%",
-                startangle=90,
-                colors=colors[: len(feedback_counts)],
-                wedgeprops={"linewidth": 2, "edgecolor": "white"},
-                textprops={"fontsize": 10, "color": text_color, "fontweight": 600},
-                pctdistance=0.75
-            )
-            
-            # Donut hole with solid colors
-            if is_light_theme:
-                centre_circle = plt.Circle((0, 0), 0.65, fc="white", ec="#e2e8f0", linewidth=2)
-                percentage_color = "#0f172a"  # Dark text for light theme
-            else:
-                centre_circle = plt.Circle((0, 0), 0.65, fc="#1e293b", ec="#334155", linewidth=2)
-                percentage_color = "white"  # White text for dark theme
-            fig.gca().add_artist(centre_circle)
-            
-            # Style percentage text - theme adaptive
-            for autotext in autotexts:
-                autotext.set_color(percentage_color)
-                autotext.set_fontweight(700)
-                autotext.set_fontsize(10)
-            
-            # Style labels
-            for text in texts:
-                text.set_color(text_color)
-                text.set_fontweight(600)
-        
-        ax.axis("equal")
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+        st.image(_feedback_mix_png(profile["id"], is_light_theme))
         st.caption("🎯 Overall session satisfaction ratings")
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1891,59 +2222,16 @@ def render_progress_dashboard(profile: Dict[str, Any]) -> None:
     else:
         st.markdown('<p style="color: #a0aec0; font-size: 14px; margin-bottom: 12px;">Understanding frequent transitions helps plan future sessions</p>', unsafe_allow_html=True)
     
-    # Create journey combinations
-    history_df['journey'] = history_df['start_mood'].str.title() + ' → ' + history_df['target_mood'].str.title()
-    journey_counts = history_df['journey'].value_counts().head(6)
-    
-    if not journey_counts.empty:
-        # Use solid background
-        fig_bg = 'white' if is_light_theme else '#0e1117'
-        ax_bg = 'white' if is_light_theme else '#0e1117'
-        
-        fig, ax = plt.subplots(figsize=(10, 4), facecolor=fig_bg)
-        ax.set_facecolor(ax_bg)
-        
-        # Gradient colors for bars
-        colors_gradient = plt.cm.viridis(np.linspace(0.3, 0.9, len(journey_counts)))
-        if is_light_theme:
-            colors_gradient = ["#6366f1", "#8b5cf6", "#a855f7", "#c026d3", "#d946ef", "#e879f9"][:len(journey_counts)]
-        
-        bars = ax.barh(journey_counts.index, journey_counts.values, 
-                      color=colors_gradient, alpha=0.9, height=0.7)
-        
-        # Add gradient effect to bars
-        for bar in bars:
-            bar.set_edgecolor("white" if is_light_theme else "#1e293b")
-            bar.set_linewidth(1.5)
-        
-        # Add count labels on bars with better styling
-        for i, (bar, count) in enumerate(zip(bars, journey_counts.values)):
-            ax.text(count + 0.15, i, f'{int(count)}x', 
-                   va='center', color=text_color, fontsize=10, fontweight='bold')
-        
-        ax.set_xlabel("Number of Sessions", color=text_color, fontsize=11, fontweight=600)
-        ax.tick_params(axis="y", labelsize=10, colors=text_color)
-        ax.tick_params(axis="x", labelsize=10, colors=text_color)
-        ax.spines["top"].set_visible(False)
-        ax.spines["right"].set_visible(False)
-        ax.spines["bottom"].set_color(spine_color)
-        ax.spines["bottom"].set_linewidth(1.5)
-        ax.spines["left"].set_color(spine_color)
-        ax.spines["left"].set_linewidth(1.5)
-        ax.grid(axis="x", linestyle="--", alpha=0.15, color=grid_color, linewidth=1)
-        
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+    journeys_png = _journeys_png(profile["id"], is_light_theme)
+    if journeys_png is not None:
+        st.image(journeys_png)
     else:
         st.info("Complete more sessions to see journey patterns")
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.subheader("Recent Sessions")
-    display_df = history_df.copy()
-    display_df["timestamp"] = display_df["timestamp"].dt.strftime("%Y-%m-%d %H:%M IST")
     st.dataframe(
-        display_df, 
+        _cached_history_table(profile["id"]), 
         use_container_width=True, 
         hide_index=True,
         column_config={
@@ -1969,8 +2257,7 @@ def render_about(profile: Optional[Dict[str, Any]]) -> None:
 
 
 def render_authenticated_app() -> None:
-    ensure_session_defaults()
-
+    # main() has already run ensure_session_defaults() for this rerun
     role = st.session_state["user_role"]
     display_name = st.session_state.get("user_display_name", "")
 
@@ -1984,7 +2271,9 @@ def render_authenticated_app() -> None:
             return
 
     profile_id = st.session_state.get("selected_profile_id")
-    active_profile = database.get_profile(profile_id) if profile_id else None
+    # Short-TTL cache shared by all sessions, so edits made elsewhere (new
+    # target mood, deleted profile) reach this session within seconds
+    active_profile = _cached_profile(profile_id) if profile_id else None
 
     if profile_id and not active_profile:
         st.warning("The selected profile is no longer available.")
@@ -2019,7 +2308,9 @@ def render_authenticated_app() -> None:
 
 def main() -> None:
     ensure_session_defaults()
-    apply_theme(st.session_state.get("theme", "dark"))
+    # ensure_session_defaults guarantees the key, and only the theme selector
+    # changes it, so there is nothing to write back here
+    apply_theme(st.session_state["theme"])
     if not require_authentication():
         render_login_signup()
     else:
@@ -2,7 +2,8 @@ import os
 import sqlite3
 import uuid
 import hashlib
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Sequence
 
 import pandas as pd
 
@@ -20,6 +21,8 @@ TARGET_MOODS = [
 def get_db_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    # Safe with WAL (set in init_db) and skips an fsync on every commit
+    conn.execute("PRAGMA synchronous=NORMAL;")
     return conn
 
 
@@ -33,6 +36,9 @@ def _ensure_column(cur: sqlite3.Cursor, table: str, column: str, definition: str
 def init_db() -> None:
     conn = get_db_connection()
     cur = conn.cursor()
+    # WAL is stored in the database file, so setting it once here covers every
+    # later connection; dashboard reads also stop blocking on session writes
+    cur.execute("PRAGMA journal_mode=WAL;")
 
     cur.execute(
         """
@@ -124,6 +130,15 @@ def init_db() -> None:
         """
     )
 
+    # Feedback is read back as lowercase tokens; normalise any older rows once
+    cur.execute(
+        """
+        UPDATE session_history
+        SET feedback_emoji = LOWER(feedback_emoji)
+        WHERE feedback_emoji <> LOWER(feedback_emoji);
+        """
+    )
+
     conn.commit()
     conn.close()
 
@@ -314,7 +329,7 @@ def get_parents_for_profile(profile_id: int) -> List[Dict[str, Any]]:
             FROM parents pr
             JOIN profile_access pa ON pa.parent_id = pr.id
             WHERE pa.profile_id = ?
-            ORDER BY pr.name ASC;
+            ORDER BY pr.name ASC, pr.id ASC;
             """,
             (profile_id,),
         ).fetchall()
@@ -323,6 +338,37 @@ def get_parents_for_profile(profile_id: int) -> List[Dict[str, Any]]:
         conn.close()
 
 
+def get_parents_for_profiles(profile_ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Batched get_parents_for_profile: one query for many profiles.
+    
+    Returns:
+        dict mapping profile_id to its parents (profiles without parents are omitted)
+    """
+    if not profile_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in profile_ids)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        rows = cur.execute(
+            f"""
+            SELECT pa.profile_id AS profile_id, pr.*
+            FROM parents pr
+            JOIN profile_access pa ON pa.parent_id = pr.id
+            WHERE pa.profile_id IN ({placeholders})
+            ORDER BY pr.name ASC, pr.id ASC;
+            """,
+            tuple(profile_ids),
+        ).fetchall()
+        grouped: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            grouped[row["profile_id"]].append(_row_to_dict(row) or {})
+        return dict(grouped)
+    finally:
+        conn.close()
+
+
 def link_parent_to_profile(parent_id: int, profile_id: int) -> None:
     conn = get_db_connection()
     cur = conn.cursor()
@@ -447,7 +493,7 @@ def list_invites_for_profile(profile_id: int) -> List[Dict[str, Any]]:
             """
             SELECT * FROM parent_invites
             WHERE profile_id = ?
-            ORDER BY created_at DESC;
+            ORDER BY created_at DESC, id DESC;
             """,
             (profile_id,),
         ).fetchall()
@@ -456,6 +502,35 @@ def list_invites_for_profile(profile_id: int) -> List[Dict[str, Any]]:
         conn.close()
 
 
+def list_invites_for_profiles(profile_ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Batched list_invites_for_profile: one query for many profiles.
+    
+    Returns:
+        dict mapping profile_id to its invites, newest first (profiles without invites are omitted)
+    """
+    if not profile_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in profile_ids)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        rows = cur.execute(
+            f"""
+            SELECT * FROM parent_invites
+            WHERE profile_id IN ({placeholders})
+            ORDER BY created_at DESC, id DESC;
+            """,
+            tuple(profile_ids),
+        ).fetchall()
+        grouped: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            grouped[row["profile_id"]].append(_row_to_dict(row) or {})
+        return dict(grouped)
+    finally:
+        conn.close()
+
+
 def complete_parent_invite(token: str, name: str, password: str) -> Dict[str, Any]:
     invite = get_invite_by_token(token)
     if not invite:
@@ -516,6 +591,8 @@ def save_session(
     feedback_emoji: Optional[str],
     playlist_json: str,
 ) -> None:
+    # Readers match lowercase tokens without re-normalising each row
+    feedback_emoji = feedback_emoji.lower() if feedback_emoji else None
     conn = get_db_connection()
     cur = conn.cursor()
     try:
@@ -543,6 +620,8 @@ def get_history(profile_id: int) -> pd.DataFrame:
             """,
             conn,
             params=(profile_id,),
+            # Parse once here so callers get datetime64 without re-parsing
+            parse_dates={"timestamp": {"format": "ISO8601"}},
         )
         return df
     finally:
@@ -10,6 +10,7 @@ import time
 import base64
 import json
 import asyncio
+import threading
 from typing import Optional, Dict, Any
 import numpy as np
 import cv2
@@ -220,6 +221,32 @@ async def _async_analyze(frame_b64: str) -> Optional[str]:
     return None
 
 
+# CascadeClassifier isn't safe to share between threads, and detection runs on
+# every session's analyzer worker as well as on Streamlit's script threads
+_cascade_local = threading.local()
+
+
+def _load_cascades():
+    """
+    Load the haar cascades once per thread; parsing the XML on every frame
+    dominated the fallback path.
+    """
+    cascades = getattr(_cascade_local, "cascades", None)
+    if cascades is not None:
+        return cascades
+    face_cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    )
+    eye_cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_eye.xml'
+    )
+    smile_cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_smile.xml'
+    )
+    _cascade_local.cascades = (face_cascade, eye_cascade, smile_cascade)
+    return _cascade_local.cascades
+
+
 def _opencv_detector(frame_data: np.ndarray) -> Optional[str]:
     """
     OpenCV-based emotion detector with enhanced feature detection.
@@ -240,16 +267,7 @@ def _opencv_detector(frame_data: np.ndarray) -> Optional[str]:
     try:
         gray = cv2.cvtColor(frame_data, cv2.COLOR_BGR2GRAY)
         
-        # Load haar cascades
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        eye_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_eye.xml'
-        )
-        smile_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_smile.xml'
-        )
+        face_cascade, eye_cascade, smile_cascade = _load_cascades()
         
         # Detect face first
         faces = face_cascade.detectMultiScale(gray, 1.3, 5)
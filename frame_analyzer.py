@@ -0,0 +1,145 @@
+"""
+Background emotion analysis for the realtime webcam stream.
+
+This lives outside app.py because Streamlit re-executes the app script on
+every rerun: a class defined there is rebuilt each time, so an analyzer kept in
+st.session_state would stop matching isinstance checks and a new worker thread
+would be started per rerun. Importing it from a regular module keeps a single
+class (and a single worker per session) for the life of the process.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from queue import Queue, Empty, Full
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FrameAnalyzer:
+    """
+    Runs an emotion detector on a background thread so the WebRTC callback never blocks.
+
+    Only the newest submitted frame is kept (a one-slot buffer); frames that
+    arrive while a detection is running overwrite each other instead of queuing.
+    """
+
+    def __init__(
+        self,
+        analyze_fn: Callable[[np.ndarray], Optional[str]],
+        emotion_queue: Queue,
+        normalize_fn: Optional[Callable[[Optional[str]], Optional[str]]] = None,
+        sample_every: int = 6,
+        min_interval: float = 1.0,
+        smooth_window: int = 5,
+        idle_timeout: float = 30.0,
+    ) -> None:
+        self.analyze_fn = analyze_fn
+        self.normalize_fn = normalize_fn
+        self.emotion_queue = emotion_queue
+        self.last_emotion: Optional[str] = None
+        # The overlay shows the majority of the last few detections so a single
+        # misread doesn't flicker the label; the queue still gets raw results
+        self._recent: deque = deque(maxlen=max(1, smooth_window))
+        # Mood changes over seconds, so only every Nth frame (and at most one
+        # per min_interval) is worth sending to the detector
+        self.sample_every = max(1, sample_every)
+        self.min_interval = min_interval
+        self._frame_counter = 0
+        self._last_submit = 0.0
+        self._slot: Optional[np.ndarray] = None
+        # Set while analyze_fn runs; the callback skips sampling rather than
+        # converting a frame the worker can't take yet
+        self._busy = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        # A closed tab never calls close(), so the worker exits on its own after
+        # idle_timeout seconds without frames; submit() restarts it if needed
+        self.idle_timeout = idle_timeout
+        self._thread: Optional[threading.Thread] = None
+        with self._lock:
+            self._start_worker()
+
+    def _start_worker(self) -> None:
+        # Caller holds _lock
+        self._thread = threading.Thread(target=self._run, name="frame-analyzer", daemon=True)
+        self._thread.start()
+
+    def should_sample(self) -> bool:
+        """Count a frame and report whether it should be analyzed."""
+        self._frame_counter += 1
+        if self._frame_counter % self.sample_every or self._busy:
+            return False
+        now = time.monotonic()
+        if now - self._last_submit < self.min_interval:
+            return False
+        self._last_submit = now
+        return True
+
+    def reset(self) -> None:
+        """Forget the current label and smoothing window."""
+        with self._lock:
+            self._recent.clear()
+            self.last_emotion = None
+
+    def close(self) -> None:
+        """Stop the worker thread; the analyzer must not be reused afterwards."""
+        self._stop.set()
+        # Wake the worker if it is waiting for a frame so it can see the stop flag
+        self._ready.set()
+
+    def submit(self, frame_bgr: np.ndarray) -> None:
+        with self._lock:
+            if self._stop.is_set():
+                return
+            self._slot = frame_bgr
+            self._ready.set()
+            if self._thread is None:
+                self._start_worker()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self._ready.wait(timeout=self.idle_timeout):
+                with self._lock:
+                    # Re-check under the lock so a frame submitted right now
+                    # either gets picked up here or restarts the worker
+                    if self._slot is None:
+                        self._thread = None
+                        return
+                continue
+            if self._stop.is_set():
+                break
+            with self._lock:
+                frame_bgr, self._slot = self._slot, None
+                self._ready.clear()
+            if frame_bgr is None:
+                continue
+            self._busy = True
+            try:
+                emotion = self.analyze_fn(frame_bgr)
+                if self.normalize_fn is not None:
+                    emotion = self.normalize_fn(emotion)
+            except Exception as exc:  # noqa: BLE001 - keep the worker alive
+                logger.warning("analyze_frame failed: %s", exc)
+                continue
+            finally:
+                self._busy = False
+            if not emotion:
+                continue
+            with self._lock:
+                self._recent.append(emotion)
+                self.last_emotion = Counter(self._recent).most_common(1)[0][0]
+            try:
+                self.emotion_queue.put_nowait(emotion)
+            except Full:
+                # Remove oldest and add new
+                try:
+                    self.emotion_queue.get_nowait()
+                    self.emotion_queue.put_nowait(emotion)
+                except (Empty, Full):
+                    pass
@@ -1,9 +1,13 @@
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+if TYPE_CHECKING:
+    from recommendation_logic import AdvancedMusicRecommender
+
 # Genres to exclude from recommendations
 DENY_LIST = [
     'hip-hop', 'rap', 'metal', 'experimental', 'electronic', 'idm',
@@ -121,6 +125,25 @@ class MusicEngine:
                 st.success(f"Music engine loaded with {len(self.df)} child-friendly tracks.")
             else:
                 st.warning("Warning: The genre filter removed all songs. Please check your DENY_LIST.")
+        self._build_va_index()
+        # Fitted lazily by recommendation_logic.get_recommender and kept for
+        # the engine's lifetime, so the KNN index is built once per engine
+        self.recommender: Optional["AdvancedMusicRecommender"] = None
+
+    def _build_va_index(self) -> None:
+        """
+        Keep valence-sorted NumPy copies of valence/arousal so range queries
+        can binary-search the valence window instead of masking every row.
+        """
+        self._va_order: Optional[np.ndarray] = None
+        if self.df.empty or not all(c in self.df.columns for c in ["valence", "arousal"]):
+            return
+        valence = self.df["valence"].to_numpy(dtype=np.float64)
+        self._va_order = np.argsort(valence, kind="stable")
+        self._valence_sorted = np.ascontiguousarray(valence[self._va_order])
+        self._arousal_sorted = np.ascontiguousarray(
+            self.df["arousal"].to_numpy(dtype=np.float64)[self._va_order]
+        )
 
     def _filter_genres(self, df: pd.DataFrame, deny_list: list) -> pd.DataFrame:
         """
@@ -161,14 +184,15 @@ class MusicEngine:
         exclude_spotify_ids: Optional[set] = None,
         random_state: Optional[int] = None,
     ) -> pd.DataFrame:
-        if self.df.empty or not all(c in self.df.columns for c in ["valence", "arousal"]):
+        if self._va_order is None:
             return pd.DataFrame()
-        subset = self.df[
-            (self.df["valence"] >= v_min)
-            & (self.df["valence"] <= v_max)
-            & (self.df["arousal"] >= a_min)
-            & (self.df["arousal"] <= a_max)
-        ]
+        lo = np.searchsorted(self._valence_sorted, v_min, side="left")
+        hi = np.searchsorted(self._valence_sorted, v_max, side="right")
+        arousal = self._arousal_sorted[lo:hi]
+        positions = self._va_order[lo:hi][(arousal >= a_min) & (arousal <= a_max)]
+        # Back to row order so sample() picks the same songs as a boolean mask would
+        positions.sort()
+        subset = self.df.iloc[positions]
         if exclude_spotify_ids and not subset.empty and "spotify_id" in subset.columns:
             subset = subset[~subset["spotify_id"].isin(exclude_spotify_ids)]
         if subset.empty:
@@ -238,6 +238,7 @@ class AdvancedMusicRecommender:
         self.scaler = StandardScaler()
         self.knn_model = None
         self.feature_matrix = None
+        self.song_ids: Optional[np.ndarray] = None
         self._initialize_models()
     
     def _initialize_models(self):
@@ -284,6 +285,13 @@ class AdvancedMusicRecommender:
             metric='euclidean'
         )
         self.knn_model.fit(self.feature_matrix)
+
+        # Positional spotify_id lookup so KNN candidates can be filtered without
+        # materializing a row Series for each one
+        if 'spotify_id' in df.columns:
+            self.song_ids = df['spotify_id'].astype(str).to_numpy()
+        else:
+            self.song_ids = np.full(len(df), '', dtype=object)
         
         print(f"[AdvancedRecommender] ML models initialized with {len(df)} songs")
         print(f"[AdvancedRecommender] Features: {feature_names}")
@@ -419,8 +427,7 @@ class AdvancedMusicRecommender:
                 scores = []
                 
                 for dist, idx in zip(distances[0], indices[0]):
-                    song = self.engine.df.iloc[idx]
-                    song_id = str(song.get('spotify_id', ''))
+                    song_id = self.song_ids[idx]
                     
                     if song_id in used_ids:
                         continue
@@ -431,7 +438,7 @@ class AdvancedMusicRecommender:
                         song_features, target_point, used_ids, song_id
                     )
                     
-                    candidates.append((song, score))
+                    candidates.append(idx)
                     scores.append(score)
                 
                 # Select from top candidates with weighted randomness
@@ -443,11 +450,12 @@ class AdvancedMusicRecommender:
                     probabilities = scores / scores.sum()
                     
                     # Randomly select from top candidates based on scores
-                    selected_idx = np.random.choice(len(candidates), p=probabilities)
-                    best_song = candidates[selected_idx][0]
+                    selected_idx = candidates[np.random.choice(len(candidates), p=probabilities)]
+                    # Only the chosen song is pulled out of the DataFrame
+                    best_song = self.engine.df.iloc[selected_idx]
                     
                     selected_songs.append(best_song)
-                    used_ids.add(str(best_song.get('spotify_id', '')))
+                    used_ids.add(self.song_ids[selected_idx])
                 
                 if len(selected_songs) >= num_steps:
                     break
@@ -465,14 +473,27 @@ class AdvancedMusicRecommender:
         return result[keep_cols]
 
 
+def get_recommender(music_engine: MusicEngine) -> AdvancedMusicRecommender:
+    """
+    Return the AdvancedMusicRecommender for an engine, fitting it on first use.
+    
+    Fitting the scaler and KNN index scans the whole dataset, so it is done
+    once per engine instead of once per playlist request. The fitted model is
+    kept in MusicEngine.recommender and is freed together with the engine.
+    """
+    if music_engine.recommender is None:
+        music_engine.recommender = AdvancedMusicRecommender(music_engine)
+    return music_engine.recommender
+
+
 def generate_playlist(music_engine: MusicEngine, start_emotion: str, 
                      target_emotion: str = "calm", num_steps: int = 5,
                      tolerance: float = 0.1, random_state: Optional[int] = None) -> pd.DataFrame:
     """
     Main interface for generating playlists using advanced ML techniques.
     
-    This function creates an AdvancedMusicRecommender instance and uses it
-    to generate a therapeutically-optimized playlist.
+    This function reuses the engine's fitted AdvancedMusicRecommender and uses
+    it to generate a therapeutically-optimized playlist.
     """
-    recommender = AdvancedMusicRecommender(music_engine)
+    recommender = get_recommender(music_engine)
     return recommender.generate_playlist(start_emotion, target_emotion, num_steps, random_state)
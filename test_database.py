@@ -0,0 +1,126 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import database
+
+"""
+Usage:
+  python test_database.py        (or: pytest test_database.py)
+
+Runs against a throwaway SQLite file; therapy.db is never touched.
+"""
+
+
+@contextmanager
+def temp_db():
+    original_path = database.DB_PATH
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "test_therapy.db")
+    try:
+        database.init_db()
+        yield
+    finally:
+        database.DB_PATH = original_path
+
+
+def seed_profiles():
+    therapist_id = database.create_therapist(
+        name="Dr Test", email="dr@example.com", password="Secret#123"
+    )
+    ana, ben, cleo = (
+        database.create_profile(
+            child_name=name, dob=None, default_target_mood="calm", therapist_id=therapist_id
+        )
+        for name in ("Ana", "Ben", "Cleo")
+    )
+
+    # Ana: two parents accepted out of name order, plus one pending invite
+    for name, email in (("Zoe", "zoe@example.com"), ("Adam", "adam@example.com")):
+        token = database.create_parent_invite(ana, email)
+        database.complete_parent_invite(token, name, "Secret#123")
+    database.create_parent_invite(ana, "pending@example.com")
+
+    # Ben: shares Adam with Ana and has his own accepted invite
+    token = database.create_parent_invite(ben, "bo@example.com")
+    database.complete_parent_invite(token, "Bo", "Secret#123")
+    adam = database.get_parent_by_email("adam@example.com")
+    database.link_parent_to_profile(adam["id"], ben)
+
+    # Cleo: no parents and no invites
+    return [ana, ben, cleo]
+
+
+def test_batched_lookups_match_single_profile_queries():
+    with temp_db():
+        profile_ids = seed_profiles()
+        parents = database.get_parents_for_profiles(profile_ids)
+        invites = database.list_invites_for_profiles(profile_ids)
+
+        for profile_id in profile_ids:
+            # Batched parent rows also carry the profile_id they were grouped by
+            batched_parents = [
+                {key: value for key, value in row.items() if key != "profile_id"}
+                for row in parents.get(profile_id, [])
+            ]
+            assert batched_parents == database.get_parents_for_profile(profile_id)
+            assert invites.get(profile_id, []) == database.list_invites_for_profile(profile_id)
+
+        ana, ben, cleo = profile_ids
+        assert [p["name"] for p in parents[ana]] == ["Adam", "Zoe"]
+        assert [p["name"] for p in parents[ben]] == ["Adam", "Bo"]
+        assert [i["email"] for i in invites[ana]] == [
+            "pending@example.com",
+            "adam@example.com",
+            "zoe@example.com",
+        ]
+        # Profiles without rows are left out rather than mapped to []
+        assert cleo not in parents and cleo not in invites
+
+
+def test_batched_lookups_with_no_ids():
+    with temp_db():
+        assert database.get_parents_for_profiles([]) == {}
+        assert database.list_invites_for_profiles([]) == {}
+
+
+def test_feedback_is_stored_lowercase():
+    with temp_db():
+        therapist_id = database.create_therapist(
+            name="Dr Test", email="dr@example.com", password="Secret#123"
+        )
+        profile_id = database.create_profile(
+            child_name="Ana", dob=None, default_target_mood="calm", therapist_id=therapist_id
+        )
+        for feedback in ("Happy", "SAD", "neutral", None):
+            database.save_session(
+                profile_id=profile_id,
+                start_mood="sad",
+                target_mood="calm",
+                feedback_emoji=feedback,
+                playlist_json="[]",
+            )
+
+        # A row written before save_session normalised case; init_db backfills it
+        conn = database.get_db_connection()
+        conn.execute(
+            "INSERT INTO session_history (profile_id, start_mood, target_mood, feedback_emoji, playlist_json) "
+            "VALUES (?, 'sad', 'calm', 'Neutral', '[]');",
+            (profile_id,),
+        )
+        conn.commit()
+        conn.close()
+        database.init_db()
+
+        history = database.get_history(profile_id)
+        assert sorted(history["feedback_emoji"].dropna()) == ["happy", "neutral", "neutral", "sad"]
+        assert history["feedback_emoji"].isna().sum() == 1
+
+
+if __name__ == "__main__":
+    for test in (
+        test_batched_lookups_match_single_profile_queries,
+        test_batched_lookups_with_no_ids,
+        test_feedback_is_stored_lowercase,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
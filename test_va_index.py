@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from music_engine import MusicEngine
+
+"""
+Usage:
+  python test_va_index.py        (or: pytest test_va_index.py)
+
+Checks that the valence-sorted searchsorted lookup in
+MusicEngine.get_songs_in_va_range selects exactly the rows the original
+boolean mask did. Uses a small synthetic table, so muse_v3.csv is not needed.
+"""
+
+# Grid values so range bounds land exactly on stored values (0.3 isn't exact in binary)
+GRID = [-1.0, -0.5, 0.0, 0.3, 0.5, 1.0]
+
+RANGES = [
+    (-0.5, 0.5, -0.5, 0.5),  # every bound sits on grid values
+    (0.3, 0.3, 0.3, 0.3),  # a single point
+    (-1.0, 1.0, -1.0, 1.0),  # everything but the NaN rows
+    (0.0, 0.3, -1.0, 0.0),
+    (0.31, 0.49, -1.0, 1.0),  # between grid values: nothing matches
+]
+
+
+def make_engine() -> MusicEngine:
+    rng = np.random.RandomState(0)
+    rows = 60
+    df = pd.DataFrame(
+        {
+            "track": [f"Track {i}" for i in range(rows)],
+            "artist": [f"Artist {i % 7}" for i in range(rows)],
+            "valence": rng.choice(GRID, size=rows),
+            "arousal": rng.choice(GRID, size=rows),
+            "spotify_id": [f"sp{i}" for i in range(rows)],
+        },
+        # Gapped index, as left behind by the genre filter
+        index=range(0, rows * 2, 2),
+    )
+    df.loc[df.index[5], "valence"] = np.nan
+    df.loc[df.index[9], "arousal"] = np.nan
+    # Skip __init__ (CSV load and Streamlit messages); only the table and index matter
+    engine = MusicEngine.__new__(MusicEngine)
+    engine.df = df
+    engine._build_va_index()
+    return engine
+
+
+def mask_reference(df, v_min, v_max, a_min, a_max, num_songs=1, exclude_spotify_ids=None, random_state=None):
+    """The boolean-mask implementation the sorted index replaced."""
+    subset = df[
+        (df["valence"] >= v_min)
+        & (df["valence"] <= v_max)
+        & (df["arousal"] >= a_min)
+        & (df["arousal"] <= a_max)
+    ]
+    if exclude_spotify_ids and not subset.empty and "spotify_id" in subset.columns:
+        subset = subset[~subset["spotify_id"].isin(exclude_spotify_ids)]
+    if subset.empty:
+        return pd.DataFrame()
+    count = min(num_songs, len(subset))
+    return subset.sample(n=count, random_state=random_state)
+
+
+def assert_same_selection(engine, bounds, **kwargs):
+    expected = mask_reference(engine.df, *bounds, **kwargs)
+    actual = engine.get_songs_in_va_range(*bounds, **kwargs)
+    if expected.empty:
+        assert actual.empty, bounds
+    else:
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_full_selection_matches_mask():
+    engine = make_engine()
+    for bounds in RANGES:
+        # Asking for every row makes sample() return the whole matching set
+        assert_same_selection(engine, bounds, num_songs=len(engine.df), random_state=1)
+
+
+def test_sampled_rows_match_mask_with_fixed_seed():
+    engine = make_engine()
+    for bounds in RANGES:
+        for seed in (0, 7, 42):
+            assert_same_selection(engine, bounds, num_songs=3, random_state=seed)
+
+
+def test_exclusions_match_mask():
+    engine = make_engine()
+    exclude = set(engine.df["spotify_id"].iloc[::3])
+    for bounds in RANGES:
+        assert_same_selection(
+            engine, bounds, num_songs=4, exclude_spotify_ids=exclude, random_state=3
+        )
+
+
+if __name__ == "__main__":
+    for test in (
+        test_full_selection_matches_mask,
+        test_sampled_rows_match_mask_with_fixed_seed,
+        test_exclusions_match_mask,
+    ):
+        test()
+        print(f"✓ {test.__name__}")